@@ -121,8 +121,13 @@ class KoeMemoGUI:
                     # 更新した設定を保存
                     with open(CONFIG_PATH, "w", encoding="utf-8") as f_save:
                         json.dump(config, f_save, ensure_ascii=False, indent=4)
-                    
-                return config
+            
+            # 旧形式の処理済みファイルセクションがあればデータベースへ移行
+            if koememo_service.migrate_processed_files(config):
+                with open(CONFIG_PATH, "w", encoding="utf-8") as f_save:
+                    json.dump(config, f_save, ensure_ascii=False, indent=4)
+            
+            return config
         except (FileNotFoundError, json.JSONDecodeError) as e:
             logger.error(f"設定ファイルの読み込みエラー: {e}")
             messagebox.showerror("エラー", f"設定ファイルの読み込みに失敗しました: {e}")
@@ -317,6 +322,16 @@ class KoeMemoGUI:
         compute_type_combo = ttk.Combobox(compute_frame, textvariable=self.compute_type_var, values=compute_types, state="readonly", width=15)
         compute_type_combo.grid(row=0, column=1, sticky=tk.W, padx=5, pady=5)
         
+        # ワーカー数
+        workers_frame = ttk.Frame(parent)
+        workers_frame.pack(fill=tk.X, pady=5)
+        
+        ttk.Label(workers_frame, text="同時処理ファイル数:").grid(row=0, column=0, sticky=tk.W, padx=5, pady=5)
+        
+        self.num_workers_var = tk.IntVar(value=self.config.get("transcription", {}).get("num_workers", 1))
+        workers_spinbox = ttk.Spinbox(workers_frame, from_=1, to=max(1, os.cpu_count() or 1), textvariable=self.num_workers_var, width=10)
+        workers_spinbox.grid(row=0, column=1, sticky=tk.W, padx=5, pady=5)
+        
         # 注意書き
         note_frame = ttk.LabelFrame(parent, text="注意", padding=10)
         note_frame.pack(fill=tk.X, pady=10)
@@ -325,6 +340,7 @@ class KoeMemoGUI:
             "• モデルサイズが大きいほど精度が高くなりますが、処理時間とメモリ使用量も増加します。\n"
             "• CPUのみの環境では計算タイプは自動的に「int8」が使用されます。\n"
             "• 言語を指定すると認識精度が向上する場合があります。\n"
+            "• 同時処理ファイル数を増やすと、CPUコアを分け合って複数ファイルを並行して文字起こしします（モデルの重みはワーカー間で共有されます）。\n"
             "• 初回実行時には選択したモデルがダウンロードされるため、インターネット接続が必要です。"
         )
         ttk.Label(note_frame, text=note_text, wraplength=700, justify="left").pack(fill=tk.X)
@@ -847,6 +863,7 @@ class KoeMemoGUI:
         self.config["transcription"]["language"] = language_mapping.get(language_display, "auto")
         
         self.config["transcription"]["compute_type"] = self.compute_type_var.get()
+        self.config["transcription"]["num_workers"] = self.num_workers_var.get()
         
         # LLM設定
         if "llm" not in self.config:
@@ -901,8 +918,6 @@ class KoeMemoGUI:
             
     def update_processed_files(self):
         """処理済みファイルリストを更新（外部からの呼び出し用）"""
-        # 設定を再読み込み
-        self.config = self.load_config()
         # 処理済みファイルビューを更新
         try:
             if hasattr(self, 'processed_tree'):
@@ -1021,39 +1036,29 @@ class KoeMemoGUI:
             
             # クリーンアップボタン
             def cleanup_processed_files():
-                processed_files = self.config.get("processed_files", {})
-                if not processed_files:
+                total = koememo_service.count_processed_files()
+                if not total:
                     messagebox.showinfo("情報", "処理済みファイルリストは空です。")
                     return
                     
                 # 確認ダイアログ
                 if messagebox.askyesno("確認", "古い処理済みファイル情報をクリーンアップしますか？\n\n※実際のファイルは削除されません。"):
-                    # 日付でソート
-                    sorted_entries = sorted(
-                        processed_files.items(),
-                        key=lambda x: x[1].get("processed_at", ""),
-                        reverse=True
-                    )
-                    
                     # 上限数を100に設定
                     max_entries = 100
                     
-                    if len(sorted_entries) <= max_entries:
-                        messagebox.showinfo("情報", f"現在の処理済みファイルは{len(sorted_entries)}件で上限（{max_entries}件）以下です。\nクリーンアップの必要はありません。")
+                    if total <= max_entries:
+                        messagebox.showinfo("情報", f"現在の処理済みファイルは{total}件で上限（{max_entries}件）以下です。\nクリーンアップの必要はありません。")
                         return
                     
                     # 上限までの項目を保持
-                    self.config["processed_files"] = dict(sorted_entries[:max_entries])
-                    
-                    # 設定を保存
-                    self.save_config()
+                    koememo_service.clean_old_processed_files(max_entries=max_entries, max_age_days=0)
                     
                     # リストを更新
                     self.refresh_processed_files()
                     
                     messagebox.showinfo("情報", 
                                       f"処理済みファイルリストをクリーンアップしました。\n"
-                                      f"（{len(sorted_entries)}件から{max_entries}件に削減）\n\n"
+                                      f"（{total}件から{max_entries}件に削減）\n\n"
                                       "※最近の処理ファイル情報のみが保持されます。")
             
             ttk.Button(control_frame, text="古い履歴を削除", command=cleanup_processed_files).pack(side=tk.LEFT, padx=5, pady=5)
@@ -1135,7 +1140,7 @@ class KoeMemoGUI:
             self.processed_tree.delete(item)
         
         # 処理済みファイルリストを取得
-        processed_files = self.config.get("processed_files", {})
+        processed_files = koememo_service.get_processed_files()
         if not processed_files:
             # データがない場合は通知を表示
             self.processed_tree.insert("", tk.END, values=("処理済みファイルはありません", "", ""))
@@ -1143,13 +1148,16 @@ class KoeMemoGUI:
         
         # データを整形してツリービューに追加
         items = []
-        for file_hash, info in processed_files.items():
+        for info in processed_files:
             # 出力ファイルパスから元ファイル名を抽出（先頭の部分）
-            output_file = info.get("output_file", "")
+            output_file = info.get("output_file") or ""
             output_basename = os.path.basename(output_file)
             
-            # "_memo_" の前の部分を取得（元ファイル名として）
-            original_name = output_basename.split("_memo_")[0] if "_memo_" in output_basename else "不明"
+            # 元ファイルのパスがあればそのファイル名、なければ "_memo_" の前の部分を使用
+            if info.get("file_path"):
+                original_name = os.path.basename(info["file_path"])
+            else:
+                original_name = output_basename.split("_memo_")[0] if "_memo_" in output_basename else "不明"
             
             # 処理日時をフォーマット
             processed_at = info.get("processed_at", "")
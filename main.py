@@ -18,26 +18,56 @@ import json
 import time
 import logging
 import threading
+import queue
 import subprocess
 import hashlib
-from datetime import datetime
+import functools
+import copy
+import random
+import socket
+from array import array
+import sqlite3
+from collections import deque, OrderedDict
+from datetime import datetime, timedelta
+from difflib import SequenceMatcher
+from email.utils import parsedate_to_datetime
 from pathlib import Path
-from typing import Dict, Any, List, Optional, Tuple
-import queue
+from typing import Callable, Dict, Any, List, NamedTuple, Optional, Tuple
 import re
+from concurrent.futures import ThreadPoolExecutor
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
 
 # サードパーティライブラリのインポート（必要に応じてインストール）
 try:
+    import numpy as np
     from faster_whisper import WhisperModel
+    from faster_whisper.audio import decode_audio
 except ImportError:
     print("エラー: faster-whisperモジュールがインストールされていません。")
     print("pip install faster-whisper を実行してインストールしてください。")
     sys.exit(1)
 
+try:
+    # バッチ推論はfaster-whisper 1.1以降で利用可能
+    from faster_whisper import BatchedInferencePipeline
+except ImportError:
+    BatchedInferencePipeline = None
+
+try:
+    from faster_whisper.utils import download_model
+except ImportError:
+    download_model = None
+
+try:
+    # OpenAIのモデルはトークナイザーがあれば正確なトークン数を使用（なければ推定）
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
 try:
     import requests
+    from requests.adapters import HTTPAdapter
 except ImportError:
     print("エラー: requestsモジュールがインストールされていません。")
     print("pip install requests を実行してインストールしてください。")
@@ -73,14 +103,178 @@ logger = logging.getLogger("app")
 
 # 設定ファイルのパス
 CONFIG_PATH = Path(__file__).parent / "config.json"
+# 処理履歴・ジョブデータベースのパス
+DB_PATH = Path(__file__).parent / "koememo.db"
+# キャッシュのディレクトリ
+CACHE_DIR = Path(__file__).parent / "cache"
 
 # グローバル変数
-whisper_model = None
-file_queue = queue.Queue()
-processing_thread = None
+# 処理待ちジョブが追加されたことを処理スレッドへ通知するイベント
+job_available = threading.Event()
+# 音声の長さを調べるジョブ（ファイル監視スレッドをFFprobeで止めないよう別スレッドで順に処理）
+duration_probe_queue: "queue.Queue[Tuple[int, str]]" = queue.Queue()
+duration_probe_thread: Optional[threading.Thread] = None
+duration_probe_lock = threading.Lock()
+processing_threads: List[threading.Thread] = []
 observer = None
 should_stop = False
 config = None  # グローバル設定変数
+config_mtime = None  # 読み込んだ設定ファイルの更新時刻
+config_lock = threading.Lock()
+
+# LLMプロバイダーごとのHTTPセッション（接続を再利用するためプロセス内で共有）
+llm_sessions: Dict[str, requests.Session] = {}
+llm_sessions_lock = threading.Lock()
+# LLMプロバイダー・モデルごとのレート制限（全ワーカーで共有）
+llm_rate_limiters: Dict[Tuple[str, str], "LlmRateLimiter"] = {}
+# 処理履歴・ジョブデータベースの接続（SQLiteの接続はスレッドごとに保持）
+db_local = threading.local()
+# 直近のLLM API呼び出し試行ごとの計測結果
+llm_attempt_history = deque(maxlen=500)
+
+# LLM APIのエンドポイント
+LLM_API_URLS = {
+    "openai": "https://api.openai.com/v1/chat/completions",
+    "anthropic": "https://api.anthropic.com/v1/messages",
+    "google": "https://generativelanguage.googleapis.com/v1beta/models/{model}:generateContent",
+    "google_stream": "https://generativelanguage.googleapis.com/v1beta/models/{model}:streamGenerateContent?alt=sse",
+}
+# ジョブの処理段階
+JOB_QUEUED = "queued"              # 処理待ち
+JOB_TRANSCRIBING = "transcribing"  # 文字起こし中
+JOB_TRANSCRIBED = "transcribed"    # 文字起こし完了（議事録生成待ち）
+JOB_SUMMARIZING = "summarizing"    # 議事録生成中
+JOB_DONE = "done"                  # 完了
+JOB_FAILED = "failed"              # 失敗
+# 未完了のジョブの段階
+JOB_ACTIVE_STAGES = (JOB_QUEUED, JOB_TRANSCRIBING, JOB_TRANSCRIBED, JOB_SUMMARIZING)
+# 処理中（いずれかのプロセスが所有している）ジョブの段階
+JOB_RUNNING_STAGES = (JOB_TRANSCRIBING, JOB_SUMMARIZING)
+# クラッシュなどで中断されたジョブを再開する回数の上限（クラッシュを繰り返すファイルで止まらないようにする）
+MAX_JOB_ATTEMPTS = 3
+# ジョブを所有するプロセスの識別名（複数のプロセスで同じデータベースを共有するため）
+JOB_OWNER = f"{socket.gethostname()}:{os.getpid()}"
+# 処理中ジョブの更新時刻を延長する間隔と、所有プロセスが停止したとみなすまでの秒数
+JOB_HEARTBEAT_INTERVAL = 30
+JOB_LEASE_SECONDS = 120
+
+# リトライ対象のHTTPステータス（レート制限・一時的なサーバーエラー）
+RETRYABLE_STATUS_CODES = {408, 429, 500, 502, 503, 504, 529}
+# レート制限・過負荷を示すHTTPステータス（同時実行数を減らす）
+RATE_LIMIT_STATUS_CODES = {429, 529}
+
+# LLMモデルの性能表: (プロバイダー, モデル名の先頭, コンテキスト長, 最大出力トークン数, トークナイザー)
+# モデル名は最も長く一致する行を使用する
+MODEL_CAPABILITIES = [
+    ("openai", "gpt-4o", 128000, 16384, "o200k"),
+    ("openai", "gpt-4.1", 1047576, 32768, "o200k"),
+    ("openai", "gpt-4-turbo", 128000, 4096, "cl100k"),
+    ("openai", "gpt-4", 8192, 8192, "cl100k"),
+    ("openai", "gpt-3.5-turbo", 16385, 4096, "cl100k"),
+    ("openai", "o1", 200000, 100000, "o200k"),
+    ("openai", "o3", 200000, 100000, "o200k"),
+    ("openai", "o4-mini", 200000, 100000, "o200k"),
+    ("anthropic", "claude-3-haiku", 200000, 4096, "claude"),
+    ("anthropic", "claude-3-sonnet", 200000, 4096, "claude"),
+    ("anthropic", "claude-3-opus", 200000, 4096, "claude"),
+    ("anthropic", "claude-3-5", 200000, 8192, "claude"),
+    ("anthropic", "claude-3-7-sonnet", 200000, 64000, "claude"),
+    ("anthropic", "claude-sonnet-4", 200000, 64000, "claude"),
+    ("anthropic", "claude-opus-4", 200000, 32000, "claude"),
+    ("google", "gemini-pro", 32760, 8192, "gemini"),
+    ("google", "gemini-1.0-pro", 32760, 8192, "gemini"),
+    ("google", "gemini-1.5-flash", 1048576, 8192, "gemini"),
+    ("google", "gemini-1.5-pro", 2097152, 8192, "gemini"),
+    ("google", "gemini-2.0-flash", 1048576, 8192, "gemini"),
+    ("google", "gemini-2.5", 1048576, 65536, "gemini"),
+]
+# 性能表にないモデルの想定（控えめな値）
+DEFAULT_MODEL_CAPABILITIES = {
+    "openai": (128000, 4096, "o200k"),
+    "anthropic": (200000, 4096, "claude"),
+    "google": (32760, 8192, "gemini"),
+}
+# トークナイザーごとの1文字あたりのトークン数の目安（日本語などの全角文字, それ以外）
+TOKENS_PER_CHAR = {
+    "o200k": (0.8, 0.3),
+    "cl100k": (1.2, 0.3),
+    "claude": (1.2, 0.35),
+    "gemini": (0.7, 0.3),
+}
+# OpenAI APIのシステムプロンプト
+SYSTEM_PROMPT = "あなたは会議の音声文字起こしから議事録を作成する専門家です。"
+WIDE_CHAR_PATTERN = re.compile(r"[\u3000-\u9fff\uf900-\uffef]")
+
+
+class JobCancelledError(Exception):
+    """処理がキャンセルまたは期限切れになったことを示す例外"""
+
+
+class CancellationToken:
+    """処理の協調的キャンセルと期限を管理するクラス
+    
+    親トークンがキャンセルされると子トークンもキャンセル扱いになる。
+    サービス全体のトークンを親にして、ジョブごとの期限付きトークンを作成する。
+    """
+    
+    def __init__(self, parent: Optional["CancellationToken"] = None, timeout: Optional[float] = None):
+        self._event = threading.Event()
+        self._reason = None
+        self.parent = parent
+        self.deadline = time.monotonic() + timeout if timeout else None
+    
+    def cancel(self, reason: str = "キャンセルされました"):
+        """キャンセルを要求"""
+        if not self._event.is_set():
+            self._reason = reason
+            self._event.set()
+    
+    def is_cancelled(self) -> bool:
+        """キャンセル済みまたは期限切れかどうか"""
+        if self._event.is_set():
+            return True
+        if self.deadline is not None and time.monotonic() >= self.deadline:
+            self.cancel("処理の制限時間を超過しました")
+            return True
+        if self.parent is not None and self.parent.is_cancelled():
+            self.cancel(self.parent.reason)
+            return True
+        return False
+    
+    @property
+    def reason(self) -> str:
+        """キャンセル理由"""
+        return self._reason or (self.parent.reason if self.parent else "") or "キャンセルされました"
+    
+    def remaining(self) -> Optional[float]:
+        """期限までの残り秒数（期限がない場合はNone）"""
+        remaining = None
+        if self.deadline is not None:
+            remaining = max(0.0, self.deadline - time.monotonic())
+        if self.parent is not None:
+            parent_remaining = self.parent.remaining()
+            if parent_remaining is not None:
+                remaining = parent_remaining if remaining is None else min(remaining, parent_remaining)
+        return remaining
+    
+    def check(self):
+        """キャンセル済みならJobCancelledErrorを送出"""
+        if self.is_cancelled():
+            raise JobCancelledError(self.reason)
+    
+    def wait(self, seconds: float) -> bool:
+        """最大seconds秒待機し、キャンセルされたらTrueを返す"""
+        end = time.monotonic() + seconds
+        while not self.is_cancelled():
+            left = end - time.monotonic()
+            if left <= 0:
+                return False
+            self._event.wait(min(left, 0.5))
+        return True
+
+
+# サービス全体のキャンセルトークン（stop_serviceでキャンセルされる）
+service_cancel_token = CancellationToken()
 
 
 class MediaFileHandler(FileSystemEventHandler):
@@ -107,7 +301,7 @@ class MediaFileHandler(FileSystemEventHandler):
                     logger.info(f"ファイルは既に処理済みです: {file_path}")
                     return
                 
-                file_queue.put(file_path)
+                enqueue_job(file_path)
 
 
 # GUIクラス
@@ -268,42 +462,291 @@ def get_file_hash(file_path: str) -> str:
         return hashlib.md5(file_path.encode()).hexdigest()
 
 
+def get_content_fingerprint(file_path: str) -> str:
+    """ファイル内容のフィンガープリントを計算
+    
+    ファイル名や場所が変わっても同じ内容なら同じ値になる。固定長で録音された同じサイズの
+    ファイルを取り違えないよう、一部ではなく内容全体をハッシュする。
+    """
+    stat = os.stat(file_path)
+    return hash_file_content(os.path.abspath(file_path), stat.st_size, stat.st_mtime_ns)
+
+
+@functools.lru_cache(maxsize=256)
+def hash_file_content(file_path: str, file_size: int, mtime_ns: int) -> str:
+    """ファイル内容全体のハッシュ（サイズ・更新時刻が同じ間は再計算しない）"""
+    digest = hashlib.sha1()
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def get_db_connection() -> sqlite3.Connection:
+    """処理履歴・ジョブデータベースへの接続を取得（初回はテーブルを作成）"""
+    conn = getattr(db_local, "conn", None)
+    if conn is None:
+        conn = sqlite3.connect(str(DB_PATH), timeout=10)
+        conn.row_factory = sqlite3.Row
+        # WALモードで読み込み（GUI・ビューワー）と書き込みを並行可能にする
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        with conn:
+            conn.execute(
+                """CREATE TABLE IF NOT EXISTS processed_files (
+                    file_hash TEXT PRIMARY KEY,
+                    file_path TEXT,
+                    output_file TEXT,
+                    processed_at TEXT NOT NULL
+                )"""
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_processed_files_path ON processed_files(file_path)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_processed_files_processed_at ON processed_files(processed_at)")
+            conn.execute(
+                """CREATE TABLE IF NOT EXISTS jobs (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    file_path TEXT NOT NULL,
+                    file_hash TEXT NOT NULL,
+                    stage TEXT NOT NULL,
+                    transcript_file TEXT,
+                    output_file TEXT,
+                    error TEXT,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    created_at TEXT NOT NULL,
+                    updated_at TEXT NOT NULL
+                )"""
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_stage ON jobs(stage, id)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_file_hash ON jobs(file_hash)")
+            # 後から追加した列（既存のデータベースにも追加する）
+            job_columns = {row["name"] for row in conn.execute("PRAGMA table_info(jobs)")}
+            for column, column_type in (("duration", "REAL"), ("model", "TEXT"), ("owner", "TEXT")):
+                if column not in job_columns:
+                    conn.execute(f"ALTER TABLE jobs ADD COLUMN {column} {column_type}")
+        db_local.conn = conn
+    return conn
+
+
+def enqueue_job(file_path: str) -> bool:
+    """ファイルの処理ジョブを登録
+    
+    Returns:
+        True: 新しいジョブを登録した場合
+        False: 同じファイルの未完了ジョブが既にある場合
+    """
+    file_hash = get_file_hash(file_path)
+    now = datetime.now().isoformat()
+    conn = get_db_connection()
+    with conn:
+        placeholders = ", ".join("?" for _ in JOB_ACTIVE_STAGES)
+        row = conn.execute(
+            f"SELECT id FROM jobs WHERE file_hash = ? AND stage IN ({placeholders}) LIMIT 1",
+            (file_hash, *JOB_ACTIVE_STAGES)
+        ).fetchone()
+        if row is not None:
+            logger.info(f"ファイルは既にキューに登録されています: {file_path}")
+            return False
+        conn.execute(
+            "INSERT INTO jobs (file_path, file_hash, stage, created_at, updated_at) VALUES (?, ?, ?, ?, ?)",
+            (file_path, file_hash, JOB_QUEUED, now, now)
+        )
+        job_id = conn.execute("SELECT last_insert_rowid()").fetchone()[0]
+    job_available.set()
+    
+    # 待ち行列の音声量を見積もれるよう長さを記録（登録自体は待たせない）
+    start_duration_probe()
+    duration_probe_queue.put((job_id, file_path))
+    return True
+
+
+def start_duration_probe():
+    """音声の長さを調べるスレッドを開始（起動済みなら何もしない）"""
+    global duration_probe_thread
+    with duration_probe_lock:
+        if duration_probe_thread is None or not duration_probe_thread.is_alive():
+            duration_probe_thread = threading.Thread(target=probe_job_durations, name="duration-probe", daemon=True)
+            duration_probe_thread.start()
+
+
+def probe_job_durations():
+    """登録されたジョブの音声の長さを順に調べて記録"""
+    while True:
+        job_id, file_path = duration_probe_queue.get()
+        try:
+            duration = get_media_duration(file_path)
+            if duration is not None:
+                conn = get_db_connection()
+                with conn:
+                    # 先にワーカーが調べて記録していれば上書きしない
+                    conn.execute("UPDATE jobs SET duration = ? WHERE id = ? AND duration IS NULL", (duration, job_id))
+        except Exception as e:
+            logger.warning(f"⚠️ 音声の長さの取得に失敗しました: {file_path}: {e}")
+
+
+def claim_next_job() -> Optional[Dict[str, Any]]:
+    """処理待ちのジョブを1件取得し、処理中の段階へ進める
+    
+    文字起こし済みのジョブは議事録生成から再開する。
+    
+    Returns:
+        ジョブ情報、または処理待ちのジョブがない場合はNone
+    """
+    conn = get_db_connection()
+    next_stage = {JOB_QUEUED: JOB_TRANSCRIBING, JOB_TRANSCRIBED: JOB_SUMMARIZING}
+    
+    while True:
+        row = conn.execute(
+            "SELECT * FROM jobs WHERE stage IN (?, ?) ORDER BY id LIMIT 1",
+            (JOB_QUEUED, JOB_TRANSCRIBED)
+        ).fetchone()
+        if row is None:
+            return None
+        
+        job = dict(row)
+        with conn:
+            # 他のスレッド・プロセスが先に取得していないことを段階の条件で保証
+            cursor = conn.execute(
+                "UPDATE jobs SET stage = ?, owner = ?, updated_at = ? WHERE id = ? AND stage = ?",
+                (next_stage[job["stage"]], JOB_OWNER, datetime.now().isoformat(), job["id"], job["stage"])
+            )
+        if cursor.rowcount == 1:
+            job["stage"] = next_stage[job["stage"]]
+            job["owner"] = JOB_OWNER
+            return job
+
+
+def update_job(job_id: int, stage: str, **fields):
+    """ジョブの段階と関連情報を更新（処理中の段階ではこのプロセスを所有者とする）"""
+    columns = ["stage = ?", "owner = ?", "updated_at = ?"]
+    values = [stage, JOB_OWNER if stage in JOB_RUNNING_STAGES else None, datetime.now().isoformat()]
+    for key in ("transcript_file", "output_file", "error", "duration", "model"):
+        if key in fields:
+            columns.append(f"{key} = ?")
+            values.append(fields[key])
+    
+    conn = get_db_connection()
+    with conn:
+        conn.execute(f"UPDATE jobs SET {', '.join(columns)} WHERE id = ?", (*values, job_id))
+
+
+def heartbeat_jobs() -> int:
+    """このプロセスが処理中のジョブの更新時刻を延長（リースの更新）
+    
+    Returns:
+        延長したジョブ数
+    """
+    placeholders = ", ".join("?" for _ in JOB_RUNNING_STAGES)
+    conn = get_db_connection()
+    with conn:
+        return conn.execute(
+            f"UPDATE jobs SET updated_at = ? WHERE owner = ? AND stage IN ({placeholders})",
+            (datetime.now().isoformat(), JOB_OWNER, *JOB_RUNNING_STAGES)
+        ).rowcount
+
+
+def recover_jobs(max_age_days: float = 30) -> int:
+    """所有プロセスが停止したジョブを再開可能な段階へ戻し、古い完了済みジョブを削除
+    
+    他のプロセスが処理中のジョブは更新時刻が延長され続けるため対象にならない。
+    一定時間更新されていないジョブだけをクラッシュによる中断とみなし、中断回数を数える。
+    
+    Returns:
+        再開対象として戻したジョブ数
+    """
+    now = datetime.now().isoformat()
+    lease_cutoff = (datetime.now() - timedelta(seconds=JOB_LEASE_SECONDS)).isoformat()
+    cutoff = (datetime.now() - timedelta(days=max_age_days)).isoformat()
+    conn = get_db_connection()
+    recovered = 0
+    with conn:
+        for running, resume in ((JOB_TRANSCRIBING, JOB_QUEUED), (JOB_SUMMARIZING, JOB_TRANSCRIBED)):
+            recovered += conn.execute(
+                "UPDATE jobs SET stage = ?, owner = NULL, attempts = attempts + 1, updated_at = ? "
+                "WHERE stage = ? AND updated_at < ?",
+                (resume, now, running, lease_cutoff)
+            ).rowcount
+        conn.execute(
+            "DELETE FROM jobs WHERE stage IN (?, ?) AND updated_at < ?",
+            (JOB_DONE, JOB_FAILED, cutoff)
+        )
+    
+    if recovered:
+        logger.info(f"中断されたジョブ {recovered}件 を再開します")
+        job_available.set()
+    return recovered
+
+
+def maintain_job_leases(cancel_token: CancellationToken):
+    """処理中ジョブのリースを定期的に延長し、停止したプロセスのジョブを回収"""
+    last = time.monotonic()
+    while not cancel_token.wait(JOB_HEARTBEAT_INTERVAL):
+        now = time.monotonic()
+        try:
+            heartbeat_jobs()
+            # スリープからの復帰直後は他のプロセスもまだリースを延長できていないため回収を見送る
+            if now - last < JOB_HEARTBEAT_INTERVAL * 2:
+                recover_jobs()
+        except sqlite3.Error as e:
+            logger.warning(f"⚠️ ジョブのリース更新に失敗しました: {e}")
+        last = now
+
+
+def migrate_processed_files(config: Dict[str, Any]) -> bool:
+    """config.jsonのprocessed_filesセクションを処理履歴データベースへ移行
+    
+    Args:
+        config: 設定（移行後はprocessed_filesキーが削除される）
+        
+    Returns:
+        True: 移行を実行した場合
+        False: 移行対象がなかった場合
+    """
+    processed_files = config.get("processed_files")
+    if processed_files is None:
+        return False
+    
+    if processed_files:
+        rows = [
+            (key, None, info.get("output_file", ""), info.get("processed_at") or datetime.now().isoformat())
+            for key, info in processed_files.items()
+        ]
+        conn = get_db_connection()
+        with conn:
+            conn.executemany(
+                "INSERT OR IGNORE INTO processed_files (file_hash, file_path, output_file, processed_at) VALUES (?, ?, ?, ?)",
+                rows
+            )
+        logger.info(f"処理済みファイル {len(rows)}件 を設定ファイルから処理履歴データベースへ移行しました")
+    
+    del config["processed_files"]
+    return True
+
+
 def is_file_processed(file_path: str) -> bool:
     """ファイルが既に処理済みかどうかをチェック"""
-    global config
-    
     # ファイルハッシュを計算
     file_hash = get_file_hash(file_path)
     
-    # 処理済みファイルリストをチェック
-    processed_files = config.get("processed_files", {})
-    
-    # ファイルパスまたはハッシュが一致する場合は処理済み
-    return file_path in processed_files or file_hash in processed_files
+    # ファイルパスまたはハッシュが一致する場合は処理済み（パスは旧形式のキー）
+    row = get_db_connection().execute(
+        "SELECT 1 FROM processed_files WHERE file_hash IN (?, ?) LIMIT 1",
+        (file_hash, file_path)
+    ).fetchone()
+    return row is not None
 
 
 def mark_file_as_processed(file_path: str, output_file: str):
     """ファイルを処理済みとしてマーク"""
-    global config
-    
     # ファイルハッシュを計算
     file_hash = get_file_hash(file_path)
     
-    # 処理情報を記録
-    processed_info = {
-        "processed_at": datetime.now().isoformat(),
-        "output_file": output_file
-    }
-    
-    # 設定ファイルに追加
-    if "processed_files" not in config:
-        config["processed_files"] = {}
-    
-    # ハッシュ値をキーとして保存
-    config["processed_files"][file_hash] = processed_info
-    
-    # 設定を保存
-    save_config(config)
+    # ハッシュ値をキーとして処理情報を記録
+    conn = get_db_connection()
+    with conn:
+        conn.execute(
+            "INSERT OR REPLACE INTO processed_files (file_hash, file_path, output_file, processed_at) VALUES (?, ?, ?, ?)",
+            (file_hash, file_path, output_file, datetime.now().isoformat())
+        )
     logger.info(f"ファイルを処理済みリストに追加しました: {file_path}")
     
     # GUI実行中の場合は処理済みファイルリストを更新
@@ -321,77 +764,198 @@ def mark_file_as_processed(file_path: str, output_file: str):
         logger.debug(f"GUIの処理済みファイルリスト更新中にエラーが発生しました（無視可能）: {e}")
 
 
+def get_processed_files(limit: Optional[int] = None) -> List[Dict[str, Any]]:
+    """処理済みファイル情報を新しい順に取得"""
+    query = "SELECT file_hash, file_path, output_file, processed_at FROM processed_files ORDER BY processed_at DESC"
+    params: Tuple = ()
+    if limit:
+        query += " LIMIT ?"
+        params = (limit,)
+    return [dict(row) for row in get_db_connection().execute(query, params)]
+
+
+def count_processed_files() -> int:
+    """処理済みファイルの件数を取得"""
+    return get_db_connection().execute("SELECT COUNT(*) FROM processed_files").fetchone()[0]
+
+
 def load_config() -> Dict[str, Any]:
     """設定ファイルの読み込み"""
     try:
         with open(CONFIG_PATH, "r", encoding="utf-8") as f:
             config_data = json.load(f)
-            
-            # 処理済みファイルセクションがなければ追加
-            if "processed_files" not in config_data:
-                config_data["processed_files"] = {}
-            
-            return config_data
+        
+        # 旧形式の処理済みファイルセクションがあればデータベースへ移行
+        if migrate_processed_files(config_data):
+            save_config(config_data)
+        
+        return config_data
     except (FileNotFoundError, json.JSONDecodeError) as e:
         logger.error(f"設定ファイルの読み込みエラー: {e}")
         sys.exit(1)
 
 
+def reload_config_if_changed():
+    """設定ファイルが更新されていれば再読み込み（モデル設定の変更は次のジョブから反映される）"""
+    global config, config_mtime
+    try:
+        mtime = os.path.getmtime(CONFIG_PATH)
+    except OSError:
+        return
+    if mtime == config_mtime:
+        return
+    
+    with config_lock:
+        if mtime == config_mtime:
+            return
+        try:
+            with open(CONFIG_PATH, "r", encoding="utf-8") as f:
+                new_config = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            # 書き込み途中などで読めない場合は現在の設定を使い続ける
+            logger.debug(f"設定ファイルの再読み込みをスキップしました: {e}")
+            return
+        
+        migrate_processed_files(new_config)
+        if config_mtime is not None:
+            logger.info("設定ファイルの変更を検出したため、設定を再読み込みしました。")
+        config = new_config
+        config_mtime = mtime
+
+
 def save_config(config: Dict[str, Any]):
     """設定ファイルの保存"""
     with open(CONFIG_PATH, "w", encoding="utf-8") as f:
         json.dump(config, f, ensure_ascii=False, indent=4)
 
 
-def clean_old_processed_files(max_entries: int = 1000):
-    """古い処理済みファイル情報をクリーンアップ"""
-    global config
+def clean_old_processed_files(max_entries: int = 1000, max_age_days: Optional[float] = None) -> int:
+    """古い処理済みファイル情報をクリーンアップ
     
-    processed_files = config.get("processed_files", {})
-    if not processed_files:
-        return
+    Args:
+        max_entries: 保持する最大件数
+        max_age_days: 保持期間（日数）。省略時は設定のprocessing.processed_files_ttl_days（0は無期限）
+        
+    Returns:
+        削除した件数
+    """
+    if max_age_days is None:
+        max_age_days = (config or {}).get("processing", {}).get("processed_files_ttl_days", 0)
     
-    # エントリ数が上限を超えている場合にクリーンアップ
-    if len(processed_files) > max_entries:
-        logger.info(f"処理済みファイルリストのクリーンアップを実行します (現在: {len(processed_files)} エントリ)")
+    conn = get_db_connection()
+    before = count_processed_files()
+    with conn:
+        # 保持期間を過ぎたエントリを削除
+        if max_age_days:
+            cutoff = (datetime.now() - timedelta(days=max_age_days)).isoformat()
+            conn.execute("DELETE FROM processed_files WHERE processed_at < ?", (cutoff,))
         
-        # 日付でソート
-        sorted_entries = sorted(
-            processed_files.items(),
-            key=lambda x: x[1].get("processed_at", ""),
-            reverse=True
+        # 上限数を超えた古いエントリを削除
+        conn.execute(
+            """DELETE FROM processed_files WHERE file_hash NOT IN (
+                SELECT file_hash FROM processed_files ORDER BY processed_at DESC LIMIT ?
+            )""",
+            (max_entries,)
         )
-        
-        # 上限数まで削減
-        config["processed_files"] = dict(sorted_entries[:max_entries])
-        save_config(config)
-        logger.info(f"処理済みファイルリストを {len(processed_files)} から {len(config['processed_files'])} エントリに削減しました")
+    after = count_processed_files()
+    
+    if before != after:
+        logger.info(f"処理済みファイルリストを {before} から {after} エントリに削減しました")
+    return before - after
 
 
-def load_whisper_model(config: Dict[str, Any]) -> Optional[WhisperModel]:
-    """WhisperModelをロード"""
+def get_num_workers(config: Dict[str, Any]) -> int:
+    """文字起こしワーカー数を取得"""
+    return max(1, int(config.get("transcription", {}).get("num_workers", 1)))
+
+
+def get_cpu_threads_per_worker(config: Dict[str, Any]) -> int:
+    """ワーカー1つあたりのCPUスレッド数を計算
+    
+    transcription.cpu_threadsで全体のスレッド数を指定できる（0はCPUコア数）。
+    全体のスレッド数をワーカー数で等分し、ワーカー同士がコアを奪い合わないようにする。
+    """
+    total_threads = int(config.get("transcription", {}).get("cpu_threads", 0)) or (os.cpu_count() or 1)
+    return max(1, total_threads // get_num_workers(config))
+
+
+def resolve_device(compute_type: str) -> Tuple[str, str]:
+    """使用するデバイスと、そのデバイスで使える計算タイプを決定"""
+    # CUDAが利用可能ならGPUを使用
+    device = "cuda" if is_cuda_available() else "cpu"
+    
+    # CPUでfloat16を指定された場合はint8に自動変換
+    if device == "cpu" and compute_type == "float16":
+        compute_type = "int8"
+    
+    return device, compute_type
+
+
+# モデル名から解決した変換済みモデルのディレクトリ
+resolved_model_paths: Dict[Tuple[str, str], str] = {}
+
+
+def resolve_model_path(model_size: str, config: Dict[str, Any]) -> str:
+    """変換済みモデルのローカルディレクトリを取得
+    
+    ダウンロード済みのモデルはネットワークに問い合わせずに使うため、複数のプロセスが
+    同じディレクトリの1つのモデルを共有し、起動時のHugging Face Hubへの確認も省ける。
+    未ダウンロードの場合のみダウンロードする。
+    """
+    if os.path.isdir(model_size) or download_model is None:
+        return model_size
+    
+    model_directory = config.get("transcription", {}).get("model_directory", "") or None
+    key = (model_size, model_directory or "")
+    if key in resolved_model_paths:
+        return resolved_model_paths[key]
+    
+    try:
+        path = download_model(model_size, cache_dir=model_directory, local_files_only=True)
+    except Exception:
+        logger.info(f"モデル '{model_size}' をダウンロードします...")
+        path = download_model(model_size, cache_dir=model_directory)
+    
+    resolved_model_paths[key] = path
+    return path
+
+
+def load_whisper_model(config: Dict[str, Any], cpu_threads: int = 0, num_workers: int = 1,
+                       model_size: Optional[str] = None, compute_type: Optional[str] = None) -> Optional[WhisperModel]:
+    """WhisperModelをロード
+    
+    Args:
+        config: アプリケーション設定
+        cpu_threads: 推論1つあたりのCPUスレッド数（0はCTranslate2の既定値）
+        num_workers: 同時にtranscribeを呼び出せる数（重みはワーカー間で共有される）
+        model_size: モデルサイズ（省略時は設定値）
+        compute_type: 計算タイプ（省略時は設定値）
+    """
     try:
         model_config = config["transcription"]
-        model_size = model_config["model_size"]
-        compute_type = model_config["compute_type"]
+        model_size = model_size or model_config["model_size"]
+        requested_compute_type = compute_type or model_config["compute_type"]
         
         logger.info(f"モデル '{model_size}' をロード中...")
         
-        # CUDAが利用可能ならGPUを使用
-        device = "cuda" if is_cuda_available() else "cpu"
-        
-        # CPUでfloat16を指定された場合はint8に自動変換
-        if device == "cpu" and compute_type == "float16":
-            compute_type = "int8"
+        device, compute_type = resolve_device(requested_compute_type)
+        if compute_type != requested_compute_type:
             logger.info("CPUでの実行のため、計算タイプをint8に自動変更しました。")
         
         model = WhisperModel(
-            model_size_or_path=model_size,
+            model_size_or_path=resolve_model_path(model_size, config),
             device=device,
-            compute_type=compute_type
+            compute_type=compute_type,
+            cpu_threads=cpu_threads,
+            num_workers=num_workers
         )
         
-        logger.info(f"モデル '{model_size}' のロードが完了しました。({device}、{compute_type})")
+        logger.info(f"モデル '{model_size}' のロードが完了しました。({device}、{compute_type}、"
+                    f"CPUスレッド数: {cpu_threads or '既定'}、同時実行数: {num_workers})")
+        if num_workers > 1:
+            # CTranslate2は同じデバイス上のワーカー間で重みを共有するため、増えるのは推論用のメモリのみ
+            logger.info(f"モデルの重み（約{estimate_model_memory_mb(model_size, compute_type):.0f}MB）は "
+                        f"{num_workers}個の同時実行で共有されます")
         return model
     
     except Exception as e:
@@ -399,6 +963,7 @@ def load_whisper_model(config: Dict[str, Any]) -> Optional[WhisperModel]:
         return None
 
 
+@functools.lru_cache(maxsize=1)
 def is_cuda_available() -> bool:
     """CUDAが利用可能かどうかを確認"""
     try:
@@ -408,6 +973,271 @@ def is_cuda_available() -> bool:
         return False
 
 
+# モデルサイズごとのパラメータ数（百万）。常駐させるモデルのメモリ使用量の見積もりに使う
+MODEL_PARAMETERS_M = {
+    "tiny": 39, "base": 74, "small": 244, "medium": 769,
+    "large": 1550, "large-v1": 1550, "large-v2": 1550, "large-v3": 1550,
+    "large-v3-turbo": 809, "turbo": 809,
+    "distil-small": 166, "distil-medium": 394, "distil-large-v2": 756, "distil-large-v3": 756
+}
+# 計算タイプごとの1パラメータあたりのバイト数
+COMPUTE_TYPE_BYTES = {
+    "int8": 1, "int8_float32": 1, "int8_float16": 1, "int8_bfloat16": 1,
+    "int16": 2, "float16": 2, "bfloat16": 2, "float32": 4
+}
+
+
+def estimate_model_memory_mb(model_size: str, compute_type: str) -> float:
+    """モデルの重みが使うメモリ量（MB）を見積もる"""
+    name = os.path.basename(str(model_size).rstrip("/\\")).replace(".en", "")
+    parameters = MODEL_PARAMETERS_M.get(name, MODEL_PARAMETERS_M["large"])
+    return parameters * COMPUTE_TYPE_BYTES.get(compute_type, 2)
+
+
+class WhisperModelManager:
+    """WhisperModelの常駐を管理するクラス
+    
+    (モデルサイズ, 計算タイプ, デバイス)とスレッド構成をキーにロード済みモデルを保持し、
+    設定が変わった場合は新しいモデルに切り替える。常駐数とメモリ予算を超えた場合は
+    最も長く使われていないモデルから解放し、一定時間使われなかったモデルも解放する。
+    get()で取得したモデルは使用中として数え、release()されるまで解放しない
+    （実行中の文字起こしのモデルを解放すると、次のジョブが同じモデルを二重にロードするため）。
+    """
+    
+    def __init__(self):
+        self._models: "OrderedDict[Tuple, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._load_locks: Dict[Tuple, threading.Lock] = {}
+    
+    def get_key(self, config: Dict[str, Any], model_size: Optional[str] = None,
+                compute_type: Optional[str] = None) -> Tuple:
+        """モデルのキーを作成"""
+        transcription_config = config["transcription"]
+        model_size = model_size or transcription_config["model_size"]
+        device, compute_type = resolve_device(compute_type or transcription_config["compute_type"])
+        
+        # 全ワーカー（と区間並列）で1つのモデルを共有し、CPUスレッドを分け合う
+        parallel_spans = max(1, int(transcription_config.get("parallel_spans", 1)))
+        num_workers = get_num_workers(config) * parallel_spans
+        cpu_threads = max(1, get_cpu_threads_per_worker(config) // parallel_spans)
+        return (model_size, compute_type, device, cpu_threads, num_workers)
+    
+    def get(self, config: Dict[str, Any], model_size: Optional[str] = None,
+            compute_type: Optional[str] = None) -> Optional[WhisperModel]:
+        """モデルを使用中として取得（未ロードの場合はロード）。使い終わったらrelease()を呼ぶ"""
+        key = self.get_key(config, model_size, compute_type)
+        with self._lock:
+            model = self._touch(key)
+            if model is not None:
+                return model
+            load_lock = self._load_locks.setdefault(key, threading.Lock())
+        
+        # 同じモデルを複数のワーカーが同時にロードしないようにする
+        with load_lock:
+            with self._lock:
+                model = self._touch(key)
+                if model is not None:
+                    return model
+            
+            model_size, compute_type, device, cpu_threads, num_workers = key
+            model = load_whisper_model(config, cpu_threads, num_workers, model_size, compute_type)
+            if model is None:
+                return None
+            
+            with self._lock:
+                self._models[key] = {
+                    "model": model,
+                    "last_used": time.monotonic(),
+                    "in_use": 1,
+                    "memory_mb": estimate_model_memory_mb(model_size, compute_type)
+                }
+                self._evict(config)
+        return model
+    
+    def release(self, model: Optional[WhisperModel]):
+        """get()で取得したモデルの使用を終了"""
+        if model is None:
+            return
+        with self._lock:
+            for entry in self._models.values():
+                if entry["model"] is model:
+                    entry["in_use"] = max(0, entry["in_use"] - 1)
+                    entry["last_used"] = time.monotonic()
+                    return
+    
+    def _touch(self, key: Tuple) -> Optional[WhisperModel]:
+        """ロード済みのモデルを使用中として記録して返す（ロック内で呼ぶ）"""
+        entry = self._models.get(key)
+        if entry is None:
+            return None
+        entry["last_used"] = time.monotonic()
+        entry["in_use"] += 1
+        self._models.move_to_end(key)
+        return entry["model"]
+    
+    def _evict(self, config: Dict[str, Any]):
+        """常駐数・メモリ予算を超えたモデルを古い順に解放（ロック内で呼ぶ）
+        
+        使用中のモデルは解放しないため、同時に使われているモデルが多い間は上限を超えることがある。
+        """
+        transcription_config = config["transcription"]
+        max_models = max(1, int(transcription_config.get("max_resident_models", 2)))
+        budget_mb = float(transcription_config.get("model_memory_budget_mb", 4096))
+        
+        for key in list(self._models):
+            total_mb = sum(entry["memory_mb"] for entry in self._models.values())
+            if len(self._models) <= max_models and total_mb <= budget_mb:
+                break
+            if self._models[key]["in_use"] > 0:
+                continue
+            del self._models[key]
+            logger.info(f"モデル '{key[0]}' ({key[1]}) を解放しました（常駐数・メモリ予算の上限）")
+    
+    def unload_idle(self, config: Dict[str, Any]):
+        """一定時間使われていないモデルと、使用中で解放できなかった上限超過分のモデルを解放"""
+        with self._lock:
+            self._evict(config)
+        idle_timeout = float(config.get("transcription", {}).get("model_idle_unload", 1800))
+        if idle_timeout <= 0:
+            return
+        
+        now = time.monotonic()
+        with self._lock:
+            idle = [key for key, entry in self._models.items()
+                    if entry["in_use"] == 0 and now - entry["last_used"] > idle_timeout]
+            for key in idle:
+                del self._models[key]
+                logger.info(f"モデル '{key[0]}' ({key[1]}) を解放しました（{idle_timeout:.0f}秒間未使用）")
+    
+    def warm_up(self, config: Dict[str, Any]):
+        """設定のモデルを事前にロードし、短い無音で推論して初回の遅延をなくす"""
+        try:
+            started = time.perf_counter()
+            model = self.get(config)
+            if model is None:
+                return
+            try:
+                language = config["transcription"].get("language")
+                segments, _ = model.transcribe(
+                    np.zeros(SAMPLING_RATE, dtype=np.float32),
+                    language=None if language == "auto" else language,
+                    beam_size=1
+                )
+                for _ in segments:
+                    pass
+            finally:
+                self.release(model)
+            logger.info(f"モデルのウォームアップが完了しました（{time.perf_counter() - started:.1f}秒）")
+        except Exception as e:
+            logger.warning(f"モデルのウォームアップに失敗しました: {e}")
+    
+    def clear(self):
+        """すべてのモデルを解放"""
+        with self._lock:
+            self._models.clear()
+
+
+# プロセス内で共有するモデルの管理
+model_manager = WhisperModelManager()
+
+# 精度の高い順のモデルサイズ
+MODEL_SIZE_LADDER = ["large-v3", "large-v2", "large", "medium", "small", "base", "tiny"]
+# 実測がない場合の実時間比（処理時間 / 音声の長さ）の目安（CPU・int8）
+DEFAULT_RTF = {"large-v3": 0.8, "large-v2": 0.8, "large": 0.8, "medium": 0.4, "small": 0.15, "base": 0.06, "tiny": 0.03}
+# (モデルサイズ, 計算タイプ)ごとの実測した実時間比（指数移動平均）
+observed_rtf: Dict[Tuple[str, str], float] = {}
+
+
+def record_rtf(model_size: str, compute_type: str, rtf: float):
+    """文字起こしの実測の実時間比を記録"""
+    key = (model_size, compute_type)
+    previous = observed_rtf.get(key)
+    observed_rtf[key] = rtf if previous is None else previous * 0.7 + rtf * 0.3
+
+
+def estimate_rtf(model_size: str, compute_type: str) -> float:
+    """モデルの実時間比を見積もる（実測があれば実測値を使用）"""
+    if (model_size, compute_type) in observed_rtf:
+        return observed_rtf[(model_size, compute_type)]
+    rtf = DEFAULT_RTF.get(model_size, DEFAULT_RTF["large"])
+    # int8以外はおおよそ2倍遅い
+    return rtf if compute_type.startswith("int8") else rtf * 2
+
+
+def get_queued_audio_seconds(exclude_job_id: Optional[int] = None) -> Tuple[float, int]:
+    """処理待ち・文字起こし中のジョブの音声の合計秒数と件数を取得"""
+    row = get_db_connection().execute(
+        "SELECT COALESCE(SUM(duration), 0), COUNT(*) FROM jobs WHERE stage IN (?, ?) AND id != ?",
+        (JOB_QUEUED, JOB_TRANSCRIBING, exclude_job_id or -1)
+    ).fetchone()
+    return float(row[0]), int(row[1])
+
+
+def select_model_for_job(job: Dict[str, Any], config: Dict[str, Any]) -> Tuple[str, str]:
+    """ジョブの音声の長さと待ち行列の量からモデルサイズと計算タイプを選ぶ
+    
+    設定のモデルから順に精度を下げた候補を試し、待ち行列全体を目標時間内に処理できる
+    最も精度の高い候補を選ぶ。判断の根拠はログに記録する。
+    
+    Returns:
+        (モデルサイズ, 計算タイプ)
+    """
+    transcription_config = config["transcription"]
+    model_size = transcription_config["model_size"]
+    compute_type = transcription_config["compute_type"]
+    if not transcription_config.get("adaptive_model", False):
+        return model_size, compute_type
+    
+    # 中断したジョブは前回選んだモデルで再開する（チェックポイントのキーがモデルを含むため、
+    # 待ち行列の変化で選び直すと最初からやり直しになる）
+    previous_size, _, previous_compute_type = (job.get("model") or "").partition("/")
+    if previous_size and previous_compute_type:
+        logger.info(f"🧭 モデル選択: 前回の {previous_size}/{previous_compute_type} で再開します")
+        return previous_size, previous_compute_type
+    
+    duration = job.get("duration")
+    if duration is None:
+        duration = get_media_duration(job["file_path"])
+        if duration is not None:
+            update_job(job["id"], job["stage"], duration=duration)
+    duration = duration or 0.0
+    queued_seconds, queued_count = get_queued_audio_seconds(job["id"])
+    target = float(transcription_config.get("adaptive_target_turnaround", 3600))
+    min_model = transcription_config.get("adaptive_min_model", "base")
+    workers = get_num_workers(config)
+    device, compute_type = resolve_device(compute_type)
+    
+    # 候補: 設定のモデル → (CPUなら)int8 → より小さいモデル（int8）
+    candidates = [(model_size, compute_type)]
+    if device == "cpu" and not compute_type.startswith("int8"):
+        candidates.append((model_size, "int8"))
+    if model_size in MODEL_SIZE_LADDER:
+        smaller = MODEL_SIZE_LADDER[MODEL_SIZE_LADDER.index(model_size) + 1:]
+        if min_model in smaller:
+            smaller = smaller[:smaller.index(min_model) + 1]
+        small_compute_type = "int8" if device == "cpu" else compute_type
+        candidates.extend((size, small_compute_type) for size in smaller)
+    
+    # 待ち行列全体（このジョブを含む）をワーカー数で分担した場合の処理時間で判断
+    selected = candidates[-1]
+    estimate = 0.0
+    for candidate in candidates:
+        estimate = (queued_seconds + duration) * estimate_rtf(*candidate) / workers
+        if estimate <= target:
+            selected = candidate
+            break
+    else:
+        estimate = (queued_seconds + duration) * estimate_rtf(*selected) / workers
+    
+    reason = (f"音声 {format_time(duration)}、待ち {queued_count}件 {format_time(queued_seconds)}、"
+              f"推定処理時間 {format_time(estimate)}、目標 {format_time(target)}")
+    if selected != (model_size, compute_type):
+        logger.info(f"🧭 モデル選択: {model_size}/{compute_type} → {selected[0]}/{selected[1]} に変更 ({reason})")
+    else:
+        logger.info(f"🧭 モデル選択: {model_size}/{compute_type} を使用 ({reason})")
+    return selected
+
+
 def check_ffmpeg() -> bool:
     """FFmpegがインストールされているか確認"""
     try:
@@ -417,47 +1247,391 @@ def check_ffmpeg() -> bool:
         return False
 
 
-def transcribe_file(file_path: str, config: Dict[str, Any]) -> Optional[str]:
-    """ファイルの文字起こし処理"""
-    global whisper_model
+def get_audio_cache_dir(config: Dict[str, Any]) -> Path:
+    """音声キャッシュのディレクトリを取得"""
+    cache_dir = config.get("processing", {}).get("audio_cache_directory", "")
+    return Path(cache_dir) if cache_dir else CACHE_DIR / "audio"
+
+
+def evict_cache_files(cache_dir: Path, pattern: str, max_bytes: Optional[int], keep: Optional[Path] = None,
+                      max_age_days: Optional[float] = None):
+    """キャッシュの合計サイズが上限を超えた場合、最も長く使われていないものから削除
     
+    max_age_daysを指定した場合は、その日数より長く使われていないものも削除する。
+    max_bytesがNoneの場合は日数だけで判断する。
+    """
+    entries = []
+    for path in cache_dir.glob(pattern):
+        try:
+            stat = path.stat()
+            entries.append((stat.st_mtime, stat.st_size, path))
+        except OSError:
+            continue
+    
+    total = sum(size for _, size, _ in entries)
+    cutoff = time.time() - max_age_days * 86400 if max_age_days else None
+    # 使用時に更新時刻を更新しているため、更新時刻の古い順が最も長く使われていない順
+    for mtime, size, path in sorted(entries):
+        expired = cutoff is not None and mtime < cutoff
+        if (max_bytes is None or total <= max_bytes) and not expired:
+            break
+        if path == keep:
+            continue
+        try:
+            path.unlink()
+            total -= size
+            logger.info(f"キャッシュを削除しました: {path.name}")
+        except OSError as e:
+            logger.warning(f"キャッシュの削除に失敗しました: {e}")
+
+
+def extract_audio(file_path: str, config: Dict[str, Any], cancel_token: CancellationToken) -> Optional[Path]:
+    """FFmpegで音声トラックだけを16kHzモノラルPCMとして抽出し、キャッシュする
+    
+    キャッシュは内容のフィンガープリントで管理するため、再実行・リトライ・名前を変えた
+    同じファイルでは動画の再デコードを行わない。
+    
+    Returns:
+        キャッシュしたPCMファイル（16bit符号付き整数、リトルエンディアン）のパス、
+        または抽出に失敗した場合はNone
+    """
+    processing_config = config.get("processing", {})
+    cache_dir = get_audio_cache_dir(config)
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    
+    cache_file = cache_dir / f"{get_content_fingerprint(file_path)}.pcm"
+    if cache_file.exists():
+        # LRUのため使用時刻を更新
+        os.utime(cache_file)
+        logger.info(f"キャッシュ済みの音声を使用します: {cache_file.name}")
+        return cache_file
+    
+    tmp_file = cache_file.with_name(f"{cache_file.stem}.{os.getpid()}.{threading.get_ident()}.tmp")
+    command = [
+        "ffmpeg", "-nostdin", "-hide_banner", "-loglevel", "error",
+        "-threads", str(get_cpu_threads_per_worker(config)),
+        "-i", file_path,
+        "-vn", "-sn", "-dn",  # 映像・字幕・データストリームはデコードしない
+        "-ac", "1", "-ar", str(SAMPLING_RATE),
+        "-f", "s16le", "-y", str(tmp_file)
+    ]
+    
+    started = time.perf_counter()
+    process = subprocess.Popen(command, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
     try:
-        # モデルが未ロードの場合はロード
-        if whisper_model is None:
-            whisper_model = load_whisper_model(config)
-            if whisper_model is None:
-                return None
-        
-        # 言語設定
-        language = config["transcription"]["language"]
-        if language == "auto":
-            language = None  # Whisperの自動検出を使用
-            logger.info("言語は自動検出を使用します。")
-        else:
-            logger.info(f"言語設定: {language}")
-        
-        base_filename = os.path.basename(file_path)
-        # モデル情報を取得
-        model_size = config["transcription"]["model_size"]
-        compute_type = config["transcription"]["compute_type"]
-        device = "cuda" if is_cuda_available() else "cpu"
+        while True:
+            try:
+                _, stderr = process.communicate(timeout=0.5)
+                break
+            except subprocess.TimeoutExpired:
+                if cancel_token.is_cancelled():
+                    process.kill()
+                    process.communicate()
+                    logger.info(f"音声の抽出を中断しました: {cancel_token.reason}")
+                    return None
         
-        logger.info(f"文字起こし開始: {base_filename} (モデル: {model_size}, デバイス: {device}, 計算タイプ: {compute_type})")
+        if process.returncode != 0:
+            logger.warning(f"⚠️ FFmpegによる音声の抽出に失敗しました: {stderr.decode(errors='replace').strip()}")
+            return None
         
-        # 文字起こしの実行
-        segments, info = whisper_model.transcribe(
-            file_path,
-            language=language,
-            beam_size=5,
-            task="transcribe"
+        os.replace(tmp_file, cache_file)
+    finally:
+        if tmp_file.exists():
+            tmp_file.unlink()
+    
+    duration = cache_file.stat().st_size / 2 / SAMPLING_RATE
+    logger.info(f"音声を抽出しました: {format_time(duration)}（{time.perf_counter() - started:.1f}秒）")
+    
+    max_bytes = int(float(processing_config.get("audio_cache_max_mb", 10240)) * 1024 * 1024)
+    evict_cache_files(cache_dir, "*.pcm", max_bytes, keep=cache_file)
+    return cache_file
+
+
+def open_pcm_audio(pcm_file: Path) -> Any:
+    """キャッシュしたPCMファイルをメモリマップで開く（実際に読んだ部分だけがメモリに載る）"""
+    return np.memmap(pcm_file, dtype="<i2", mode="r")
+
+
+def to_float_audio(samples: Any) -> Any:
+    """16bit整数のPCMをfaster-whisper用のfloat32配列に変換"""
+    if samples.dtype == np.float32:
+        return samples
+    return np.asarray(samples, dtype=np.float32) / 32768.0
+
+
+def decode_audio_range(file_path: str, start: float, end: float) -> Optional[Any]:
+    """FFmpegでファイルの一部の範囲だけを16kHzモノラルのPCMにデコード（ファイル全体は読み込まない）"""
+    command = [
+        "ffmpeg", "-nostdin", "-hide_banner", "-loglevel", "error",
+        "-ss", f"{start:.3f}", "-t", f"{max(0.0, end - start):.3f}", "-i", file_path,
+        "-vn", "-sn", "-dn", "-ac", "1", "-ar", str(SAMPLING_RATE), "-f", "s16le", "-"
+    ]
+    try:
+        result = subprocess.run(command, capture_output=True, timeout=300)
+    except (FileNotFoundError, subprocess.TimeoutExpired) as e:
+        logger.warning(f"⚠️ FFmpegによる音声のデコードに失敗しました（{format_time(start)}～{format_time(end)}）: {e}")
+        return None
+    if result.returncode != 0:
+        logger.warning(f"⚠️ FFmpegによる音声のデコードに失敗しました（{format_time(start)}～{format_time(end)}）: "
+                       f"{result.stderr.decode(errors='replace').strip()}")
+        return None
+    return np.frombuffer(result.stdout, dtype="<i2")
+
+
+def get_media_duration(file_path: str) -> Optional[float]:
+    """FFprobeでメディアファイルの長さ（秒）を取得"""
+    try:
+        result = subprocess.run(
+            ["ffprobe", "-v", "error", "-show_entries", "format=duration",
+             "-of", "default=noprint_wrappers=1:nokey=1", file_path],
+            capture_output=True, text=True, timeout=30
         )
+        return float(result.stdout.strip()) if result.returncode == 0 else None
+    except (FileNotFoundError, ValueError, subprocess.TimeoutExpired):
+        return None
+
+
+# faster-whisperが扱う音声のサンプリングレート
+SAMPLING_RATE = 16000
+
+
+def get_transcribe_options(config: Dict[str, Any], beam: Optional[bool] = None) -> Dict[str, Any]:
+    """WhisperModel.transcribeに渡すオプションを設定から作成
+    
+    Args:
+        config: アプリケーション設定
+        beam: ビームサーチを使うかどうか（省略時はdecodingの設定に従う。adaptive・greedyは貪欲法）
+    """
+    transcription_config = config["transcription"]
+    language = transcription_config["language"]
+    if language == "auto":
+        language = None  # Whisperの自動検出を使用
+    
+    if beam is None:
+        beam = transcription_config.get("decoding", "adaptive") == "beam"
+    
+    options = {
+        "language": language,
+        "beam_size": max(1, int(transcription_config.get("beam_size", 5))) if beam else 1,
+        "patience": float(transcription_config.get("patience", 1.0)),
+        # 品質検査に失敗した場合に順に試す温度
+        "temperature": [float(t) for t in transcription_config.get("temperature", [0.0, 0.2, 0.4, 0.6, 0.8, 1.0])],
+        "log_prob_threshold": float(transcription_config.get("log_prob_threshold", -1.0)),
+        "compression_ratio_threshold": float(transcription_config.get("compression_ratio_threshold", 2.4)),
+        "no_speech_threshold": float(transcription_config.get("no_speech_threshold", 0.6)),
+        "task": "transcribe"
+    }
+    
+    # 音声区間検出（VAD）で無音・非音声部分を推論前に除外（時刻は元の音声の位置のまま）
+    if transcription_config.get("vad_filter", True):
+        options["vad_filter"] = True
+        options["vad_parameters"] = {
+            "threshold": float(transcription_config.get("vad_threshold", 0.5)),
+            "min_silence_duration_ms": int(transcription_config.get("vad_min_silence_ms", 2000)),
+            "speech_pad_ms": int(transcription_config.get("vad_speech_pad_ms", 400))
+        }
+    
+    return options
+
+
+class TranscriptSegment(NamedTuple):
+    """文字起こしの1セグメント（時刻は元の音声の位置）と認識の信頼度"""
+    start: float
+    end: float
+    text: str
+    avg_logprob: float = 0.0
+    no_speech_prob: float = 0.0
+    compression_ratio: float = 0.0
+
+
+class RepetitionDetector:
+    """Whisperの繰り返しループ（同じ文の連続出力）をセグメント単位で検出"""
+    
+    def __init__(self, config: Dict[str, Any]):
+        transcription_config = config["transcription"]
+        self.enabled = transcription_config.get("repetition_detection", True)
+        # ほぼ同じセグメントがこの回数続いたらループとみなす
+        self.max_repeats = max(2, int(transcription_config.get("repetition_max_repeats", 3)))
+        self.similarity = float(transcription_config.get("repetition_similarity", 0.9))
+        # 相づち（「はい。」など）の連続は通常の会話なので、一定の長さ以上のテキストが
+        # 一定時間以上続くか、圧縮率が高い（セグメント内でも繰り返している）場合だけループとみなす
+        self.min_chars = int(transcription_config.get("repetition_min_chars", 8))
+        self.min_duration = float(transcription_config.get("repetition_min_duration", 30))
+        self.compression_ratio = float(transcription_config.get("repetition_compression_ratio", 2.4))
+        # 1セグメント内で同じ語句（2～30文字）がこの回数続いたらループとみなす
+        # （「ええ、ええ、…」や「………」のような短い繰り返しは通常の発話なので、繰り返し部分が
+        # 一定の長さ以上で、セグメントの圧縮率も高い場合だけを対象にする）
+        ngram_repeats = max(2, int(transcription_config.get("repetition_ngram_repeats", 6)))
+        self.ngram_pattern = re.compile(r"(.{2,30}?)\1{%d,}" % (ngram_repeats - 1), re.DOTALL)
+        self.ngram_min_chars = int(transcription_config.get("repetition_ngram_min_chars", 40))
+        self.previous = ""
+        self.repeats = 0
+        self.run_start = 0.0
+        self.run_compression = 0.0
+    
+    def reset(self):
+        self.previous = ""
+        self.repeats = 0
+        self.run_start = 0.0
+        self.run_compression = 0.0
+    
+    def is_similar(self, text: str, other: str) -> bool:
+        """句読点・空白を除いた2つのテキストがほぼ同じかどうか"""
+        a, b = self.normalize(text), self.normalize(other)
+        return bool(a) and SequenceMatcher(None, a, b).ratio() >= self.similarity
+    
+    @staticmethod
+    def normalize(text: str) -> str:
+        return re.sub(r"[\s、。,.!?！？]", "", text)
+    
+    def check(self, text: str, start: float = 0.0, end: float = 0.0, compression_ratio: float = 0.0) -> bool:
+        """セグメントを追加し、ループに入っていればTrueを返す
         
-        # 結果を文字列にまとめる - ジェネレータをそのまま処理
-        result = []
-        segment_count = 0
-        last_progress_time = time.time()
-        estimated_segments = 0  # 推定セグメント数（音声の長さから概算）
+        Args:
+            text: セグメントのテキスト
+            start: セグメントの開始秒
+            end: セグメントの終了秒
+            compression_ratio: セグメントのテキストの圧縮率
+        """
+        if not self.enabled:
+            return False
+        if compression_ratio >= self.compression_ratio:
+            match = self.ngram_pattern.search(text)
+            if match and len(match.group(0)) >= self.ngram_min_chars:
+                return True
+        
+        normalized = self.normalize(text)
+        if normalized and SequenceMatcher(None, self.previous, normalized).ratio() >= self.similarity:
+            self.repeats += 1
+            self.run_compression = max(self.run_compression, compression_ratio)
+        else:
+            self.repeats = 1
+            self.run_start = start
+            self.run_compression = compression_ratio
+        self.previous = normalized
+        if self.repeats < self.max_repeats or len(normalized) < self.min_chars:
+            return False
+        return end - self.run_start >= self.min_duration or self.run_compression >= self.compression_ratio
+
+
+class TranscriptCheckpoint:
+    """文字起こし中のセグメントを逐次追記するチェックポイントファイル
+    
+    1行に1セグメントをJSONで追記し、一定間隔でディスクに同期する。中断・クラッシュ後は
+    最後に書き込まれたセグメントの終了時刻から文字起こしを再開できる。
+    破棄したセグメントは{"truncate": 開始秒}の行で取り消す。
+    """
+    
+    def __init__(self, path: Path, fsync_interval: float = 10.0):
+        self.path = path
+        self.fsync_interval = fsync_interval
+        self.file = None
+        self.last_sync = 0.0
+        self.lock = threading.Lock()
+    
+    def load(self) -> List[TranscriptSegment]:
+        """書き込み済みのセグメントを読み込む（途中で切れた最後の行は無視）"""
+        segments = []
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        break
+                    if isinstance(entry, dict):
+                        segments = [segment for segment in segments if segment.start < entry["truncate"]]
+                    else:
+                        segments.append(TranscriptSegment(*entry))
+        except OSError:
+            return []
+        return segments
+    
+    def _write(self, entry: Any):
+        with self.lock:
+            if self.file is None:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                self.file = open(self.path, "a", encoding="utf-8")
+            self.file.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            self.file.flush()
+            now = time.monotonic()
+            if now - self.last_sync >= self.fsync_interval:
+                os.fsync(self.file.fileno())
+                self.last_sync = now
+    
+    def append(self, segment: TranscriptSegment):
+        self._write(list(segment))
+    
+    def truncate(self, start: float):
+        """指定した時刻以降に始まるセグメントを取り消す"""
+        self._write({"truncate": start})
+    
+    def close(self):
+        with self.lock:
+            if self.file is not None:
+                self.file.flush()
+                os.fsync(self.file.fileno())
+                self.file.close()
+                self.file = None
+    
+    def remove(self):
+        self.close()
+        try:
+            self.path.unlink()
+        except FileNotFoundError:
+            pass
+
+
+def transcribe_audio(whisper_model: Any, audio: Any, options: Dict[str, Any],
+                     cancel_token: CancellationToken, offset: float = 0.0,
+                     label: str = "", stats: Optional[Dict[str, float]] = None,
+                     detector: Optional[RepetitionDetector] = None,
+                     checkpoint: Optional[TranscriptCheckpoint] = None) -> Optional[List[TranscriptSegment]]:
+    """音声を文字起こししてセグメントのリストを返す
+    
+    繰り返しループを検出した場合はデコードを打ち切り、ループした部分を破棄して
+    その後ろから文字起こしを再開する。
+    
+    Args:
+        whisper_model: 使用するモデル（WhisperModelまたはBatchedInferencePipeline）
+        audio: ファイルパスまたは16kHzの音声データ（numpy配列）
+        options: transcribeに渡すオプション
+        cancel_token: キャンセルトークン
+        offset: セグメントの時刻に加算する秒数（分割した区間の開始位置）
+        label: 進捗ログに付けるラベル
+        stats: 音声の長さなどの統計を加算する辞書
+        detector: 繰り返しループの検出器
+        checkpoint: セグメントを逐次書き込むチェックポイント
         
+    Returns:
+        セグメントのリスト、または中断された場合はNone
+    """
+    # 結果をまとめる - ジェネレータをそのまま処理
+    result = []
+    segment_count = 0
+    last_progress_time = time.time()
+    # 再開した位置（音声の先頭からの秒数）
+    position = 0.0
+    if detector is not None:
+        # 状態は呼び出しごとに持つ（並列の区間で共有しない）。再開後も状態を引き継ぎ、
+        # ループが続いていればすぐに次の打ち切りを行う
+        detector = copy.copy(detector)
+        detector.reset()
+    
+    while True:
+        if position > 0:
+            segments, info = whisper_model.transcribe(audio[int(position * SAMPLING_RATE):], **options)
+        else:
+            segments, info = whisper_model.transcribe(audio, **options)
+            if stats is not None:
+                duration = getattr(info, "duration", 0.0) or 0.0
+                stats["duration"] = stats.get("duration", 0.0) + duration
+                # 全体が無音の場合のVAD後の長さ0.0は正当な値なので、未設定（None）の場合だけ全体の長さを使う
+                duration_after_vad = getattr(info, "duration_after_vad", None)
+                if duration_after_vad is None:
+                    duration_after_vad = duration
+                stats["duration_after_vad"] = stats.get("duration_after_vad", 0.0) + duration_after_vad
+        loop_start = None
         # segmentsはジェネレータなのでリストに変換せずに処理
         for segment in segments:
             segment_count += 1
@@ -470,22 +1644,751 @@ def transcribe_file(file_path: str, config: Dict[str, Any]) -> Optional[str]:
                 # テキストをログに表示（長い場合は省略）
                 if len(text_preview) > 30:
                     text_preview = text_preview[:27] + "..."
-                logger.info(f"文字起こし進捗: セグメント {segment_count} - \"{text_preview}\"")
+                logger.info(f"文字起こし進捗{label}: セグメント {segment_count} - \"{text_preview}\"")
                 
-            if should_stop:
-                logger.info("文字起こし処理が中断されました。")
+            if should_stop or cancel_token.is_cancelled():
+                logger.info(f"文字起こし処理が中断されました{label}: {cancel_token.reason}")
                 return None
             
-            start_time = format_time(segment.start)
-            end_time = format_time(segment.end)
             text = segment.text.strip()
+            if not text:
+                continue
+            start, end = segment.start + position + offset, segment.end + position + offset
+            if detector is not None and detector.check(text, start, end, segment.compression_ratio):
+                # 最初の1回だけ残し、続いた繰り返しと現在のセグメントを破棄
+                loop_start = start
+                while len(result) >= 2 and detector.is_similar(result[-1].text, result[-2].text):
+                    loop_start = result.pop().start
+                loop_end = end
+                position += segment.end
+                if checkpoint is not None:
+                    checkpoint.truncate(loop_start)
+                break
+            result.append(TranscriptSegment(start, end, text,
+                                            segment.avg_logprob, segment.no_speech_prob, segment.compression_ratio))
+            if checkpoint is not None:
+                checkpoint.append(result[-1])
+        else:
+            return result
+        
+        # 残りのデコードを打ち切り、ループした部分の後ろから再開
+        if hasattr(segments, "close"):
+            segments.close()
+        preview = text if len(text) <= 30 else text[:27] + "..."
+        logger.warning(f"🔁 繰り返しループを検出しました{label}: \"{preview}\" "
+                       f"{format_time(loop_start)}-{format_time(loop_end)} を破棄して再開します")
+        if stats is not None:
+            stats["repetition_loops"] = stats.get("repetition_loops", 0) + 1
+            stats["repetition_dropped"] = stats.get("repetition_dropped", 0.0) + (loop_end - loop_start)
+        if isinstance(audio, str):
+            audio = decode_audio(audio, sampling_rate=SAMPLING_RATE)
+        if int(position * SAMPLING_RATE) >= len(audio):
+            return result
+
+
+def format_segments(segments: List[TranscriptSegment]) -> str:
+    """セグメントを[HH:MM:SS -> HH:MM:SS] text形式のテキストに変換"""
+    return "\n".join(f"[{format_time(segment.start)} -> {format_time(segment.end)}] {segment.text}" for segment in segments)
+
+
+class Transcript:
+    """文字起こし結果（セグメントの開始・終了秒とテキストの並列配列）
+    
+    時刻は秒の小数のまま保持し、[HH:MM:SS -> HH:MM:SS] text形式のテキストは
+    ファイルへの保存時とプロンプトの作成時にだけ必要な範囲を生成する。
+    """
+    __slots__ = ("starts", "ends", "texts")
+    
+    LINE_PATTERN = re.compile(r"^\[(\d+):(\d{2}):(\d{2}) -> (\d+):(\d{2}):(\d{2})\] ?(.*)$")
+    
+    def __init__(self, starts=(), ends=(), texts=()):
+        self.starts = array("d", starts)
+        self.ends = array("d", ends)
+        self.texts = list(texts)
+    
+    @classmethod
+    def from_segments(cls, segments: List[TranscriptSegment]) -> "Transcript":
+        return cls([segment.start for segment in segments], [segment.end for segment in segments],
+                   [segment.text for segment in segments])
+    
+    @classmethod
+    def parse(cls, text: str) -> "Transcript":
+        """保存済みの文字起こしファイルのテキストを読み込む（時刻のない行は直前の行に続ける）"""
+        transcript = cls()
+        for line in text.splitlines():
+            match = cls.LINE_PATTERN.match(line)
+            if match:
+                h1, m1, s1, h2, m2, s2, body = match.groups()
+                transcript.starts.append(int(h1) * 3600 + int(m1) * 60 + int(s1))
+                transcript.ends.append(int(h2) * 3600 + int(m2) * 60 + int(s2))
+                transcript.texts.append(body)
+            elif line.strip():
+                if transcript.texts:
+                    transcript.texts[-1] += "\n" + line
+                else:
+                    transcript.starts.append(0.0)
+                    transcript.ends.append(0.0)
+                    transcript.texts.append(line)
+        return transcript
+    
+    def __len__(self) -> int:
+        return len(self.texts)
+    
+    def format(self, lo: int = 0, hi: Optional[int] = None) -> str:
+        """lo～hi番目のセグメントを[HH:MM:SS -> HH:MM:SS] text形式のテキストに変換"""
+        hi = len(self.texts) if hi is None else hi
+        return "\n".join(f"[{format_time(self.starts[i])} -> {format_time(self.ends[i])}] {self.texts[i]}"
+                         for i in range(lo, hi))
+
+
+def find_quiet_point(audio: Any, lo: int, hi: int) -> int:
+    """指定範囲（サンプル番号）で最も静かな位置を探す
+    
+    0.1秒単位のフレームごとの音量（RMS）を0.5秒の移動平均で平滑化して比較する。
+    範囲内だけを読むため、メモリマップした長い音声でも全体を読み込まない。
+    """
+    frame_size = SAMPLING_RATE // 10
+    lo = max(0, lo)
+    num_frames = (min(hi, len(audio)) - lo) // frame_size
+    if num_frames < 1:
+        return min(hi, len(audio))
+    
+    frames = to_float_audio(audio[lo:lo + num_frames * frame_size]).reshape(num_frames, frame_size)
+    rms = np.sqrt(np.mean(frames ** 2, axis=1))
+    rms = np.convolve(rms, np.ones(5) / 5, mode="same")
+    return lo + int(np.argmin(rms)) * frame_size
+
+
+def find_split_points(audio: Any, num_spans: int, search_window: float = 30.0) -> List[int]:
+    """音声をほぼ等しい長さの区間に分割する位置を無音部分から探す
+    
+    Args:
+        audio: 16kHzの音声データ
+        num_spans: 分割数
+        search_window: 等分位置の前後で無音を探す範囲（秒）
+        
+    Returns:
+        分割位置（サンプル番号）のリスト
+    """
+    window = int(search_window * SAMPLING_RATE)
+    split_points = []
+    for i in range(1, num_spans):
+        target = len(audio) * i // num_spans
+        # 探索範囲で最も静かな位置で分割
+        split_point = find_quiet_point(audio, target - window, target + window)
+        if 0 < split_point < len(audio):
+            split_points.append(split_point)
+    
+    return sorted(set(split_points))
+
+
+def iter_audio_windows(read_samples, window_samples: int, search_samples: int):
+    """音声を固定サイズ以下のウィンドウに区切って順に返す
+    
+    ウィンドウの末尾付近で最も静かな位置で区切り、残りは次のウィンドウの先頭に回す。
+    メモリに保持するのは常に1ウィンドウ分だけになる。
+    
+    Args:
+        read_samples: 最大n個の16bit整数サンプルを読む関数（終端では短い配列を返す）
+        window_samples: ウィンドウの最大サンプル数
+        search_samples: 区切り位置を探すウィンドウ末尾の範囲（サンプル数）
+        
+    Yields:
+        (ウィンドウ先頭のサンプル番号, float32の音声データ)
+    """
+    buffer = np.empty(0, dtype=np.int16)
+    offset = 0
+    while True:
+        need = window_samples - len(buffer)
+        chunk = read_samples(need)
+        at_end = len(chunk) < need
+        buffer = np.concatenate([buffer, chunk]) if len(buffer) else np.asarray(chunk)
+        if len(buffer) == 0:
+            return
+        
+        cut = len(buffer) if at_end else find_quiet_point(buffer, len(buffer) - search_samples, len(buffer))
+        if cut <= 0:
+            cut = len(buffer)
+        yield offset, to_float_audio(buffer[:cut])
+        
+        offset += cut
+        buffer = buffer[cut:]
+        if at_end and len(buffer) == 0:
+            return
+
+
+def transcribe_streaming(whisper_model: WhisperModel, source: Any, options: Dict[str, Any],
+                         window_seconds: float, cancel_token: CancellationToken,
+                         stats: Optional[Dict[str, float]] = None,
+                         detector: Optional[RepetitionDetector] = None,
+                         checkpoint: Optional[TranscriptCheckpoint] = None,
+                         start_offset: float = 0.0, follow_timeout: Optional[float] = None,
+                         on_segments: Optional[Callable[[List[TranscriptSegment]], None]] = None
+                         ) -> Optional[List[TranscriptSegment]]:
+    """音声を固定サイズのウィンドウごとにデコードしながら文字起こしする
+    
+    Args:
+        whisper_model: 使用するモデル
+        source: メモリマップしたPCM、またはファイルパス（FFmpegのパイプ出力から読む）
+        options: transcribeに渡すオプション
+        window_seconds: ウィンドウの長さ（秒）
+        cancel_token: キャンセルトークン
+        stats: 音声の長さなどの統計を加算する辞書
+        detector: 繰り返しループの検出器
+        checkpoint: セグメントを逐次書き込むチェックポイント
+        start_offset: 文字起こしを開始する位置（秒、再開時）
+        follow_timeout: 指定した場合は書き込み中のファイルを追いかけて読み、この秒数増えなければ終了
+        on_segments: ウィンドウごとの文字起こし結果を受け取る関数
+        
+    Returns:
+        時刻を元の音声の位置に戻したセグメントのリスト、または中断された場合はNone
+    """
+    window_samples = int(window_seconds * SAMPLING_RATE)
+    search_samples = min(window_samples // 4, 30 * SAMPLING_RATE)
+    process = None
+    
+    if isinstance(source, str):
+        # キャッシュがない場合はFFmpegのパイプ出力を少しずつ読む
+        command = ["ffmpeg", "-nostdin", "-hide_banner", "-loglevel", "error", "-ss", f"{start_offset:.3f}"]
+        if follow_timeout:
+            # ファイル末尾に達しても追記を待って読み続ける
+            command += ["-follow", "1", "-rw_timeout", str(int(follow_timeout * 1000000)), "-i", f"file:{source}"]
+        else:
+            command += ["-i", source]
+        process = subprocess.Popen(
+            command + ["-vn", "-sn", "-dn", "-ac", "1", "-ar", str(SAMPLING_RATE), "-f", "s16le", "-"],
+            stdout=subprocess.PIPE, stderr=subprocess.DEVNULL
+        )
+        
+        def kill_on_cancel():
+            # パイプの読み込みで待機中でもキャンセルできるようにする
+            while process.poll() is None:
+                if cancel_token.wait(0.5):
+                    process.kill()
+                    return
+        
+        threading.Thread(target=kill_on_cancel, daemon=True).start()
+        
+        def read_samples(n: int):
+            return np.frombuffer(process.stdout.read(n * 2), dtype="<i2")
+    else:
+        position = int(start_offset * SAMPLING_RATE)
+        
+        def read_samples(n: int):
+            nonlocal position
+            samples = source[position:position + n]
+            position += len(samples)
+            return samples
+    
+    result = []
+    try:
+        for index, (offset, window) in enumerate(iter_audio_windows(read_samples, window_samples, search_samples), 1):
+            if cancel_token.is_cancelled():
+                return None
+            segments = transcribe_audio(whisper_model, window, options, cancel_token,
+                                        offset=start_offset + offset / SAMPLING_RATE, label=f" [ウィンドウ {index}]",
+                                        stats=stats, detector=detector, checkpoint=checkpoint)
+            if segments is None:
+                return None
+            result.extend(segments)
+            if on_segments is not None:
+                on_segments(segments)
+    finally:
+        if process is not None:
+            process.kill()
+            process.wait()
+    
+    return result
+
+
+def transcribe_in_spans(whisper_model: WhisperModel, audio: Any, options: Dict[str, Any],
+                        num_spans: int, cancel_token: CancellationToken,
+                        stats: Optional[Dict[str, float]] = None,
+                        detector: Optional[RepetitionDetector] = None) -> Optional[List[TranscriptSegment]]:
+    """音声を無音部分で分割し、各区間を並列に文字起こしする
+    
+    Returns:
+        時刻を元の音声の位置に戻して結合したセグメントのリスト、または失敗・中断時はNone
+    """
+    split_points = find_split_points(audio, num_spans)
+    bounds = [0] + split_points + [len(audio)]
+    spans = [(bounds[i], bounds[i + 1]) for i in range(len(bounds) - 1)]
+    logger.info("音声を {}区間に分割しました: {}".format(
+        len(spans), ", ".join(f"{format_time(start / SAMPLING_RATE)}-{format_time(end / SAMPLING_RATE)}" for start, end in spans)
+    ))
+    
+    # いずれかの区間が失敗したら残りの区間も中断する
+    span_token = CancellationToken(parent=cancel_token)
+    span_stats = [{} for _ in spans]
+    
+    def run_span(index: int, start: int, end: int):
+        try:
+            return transcribe_audio(whisper_model, to_float_audio(audio[start:end]), options, span_token,
+                                    offset=start / SAMPLING_RATE, label=f" [区間 {index}]",
+                                    stats=span_stats[index - 1], detector=detector)
+        except Exception:
+            span_token.cancel("他の区間の文字起こしに失敗しました")
+            raise
+    
+    with ThreadPoolExecutor(max_workers=len(spans), thread_name_prefix="span") as executor:
+        futures = [executor.submit(run_span, i, start, end) for i, (start, end) in enumerate(spans, 1)]
+    
+    result = []
+    for future in futures:
+        segments = future.result()
+        if segments is None:
+            return None
+        result.extend(segments)
+    
+    if stats is not None:
+        for span_stat in span_stats:
+            for key, value in span_stat.items():
+                stats[key] = stats.get(key, 0.0) + value
+    return result
+
+
+def get_refine_thresholds(config: Dict[str, Any]) -> Tuple[float, float, float]:
+    """2パス方式で再デコードする低信頼セグメントの閾値（対数確率、圧縮率、非音声確率）"""
+    transcription_config = config["transcription"]
+    return (float(transcription_config.get("refine_logprob_threshold", -0.8)),
+            float(transcription_config.get("refine_compression_ratio_threshold", 2.4)),
+            float(transcription_config.get("refine_no_speech_threshold", 0.6)))
+
+
+def get_fallback_thresholds(config: Dict[str, Any]) -> Tuple[float, float, float]:
+    """貪欲法の結果をビームサーチでやり直す品質検査の閾値（対数確率、圧縮率、非音声確率）"""
+    transcription_config = config["transcription"]
+    return (float(transcription_config.get("log_prob_threshold", -1.0)),
+            float(transcription_config.get("compression_ratio_threshold", 2.4)),
+            float(transcription_config.get("no_speech_threshold", 0.6)))
+
+
+def is_low_confidence(segment: TranscriptSegment, thresholds: Tuple[float, float, float]) -> bool:
+    """セグメントの認識の信頼度が低いかどうか
+    
+    平均対数確率が低い、または圧縮率が高い（同じ語の繰り返し）セグメントを低信頼とする。
+    非音声の可能性が高いセグメントはデコードし直しても改善しないため対象外。
+    """
+    logprob_threshold, compression_ratio_threshold, no_speech_threshold = thresholds
+    if segment.no_speech_prob > no_speech_threshold:
+        return False
+    return segment.avg_logprob < logprob_threshold or segment.compression_ratio > compression_ratio_threshold
+
+
+def find_refine_ranges(segments: List[TranscriptSegment], thresholds: Tuple[float, float, float],
+                       padding: float = 0.5, merge_gap: float = 2.0) -> List[Tuple[float, float]]:
+    """低信頼のセグメントを前後に余裕を持たせて結合し、再デコードする時間範囲を返す"""
+    ranges = []
+    for segment in segments:
+        if not is_low_confidence(segment, thresholds):
+            continue
+        start, end = max(0.0, segment.start - padding), segment.end + padding
+        if ranges and start - ranges[-1][1] <= merge_gap:
+            ranges[-1] = (ranges[-1][0], max(ranges[-1][1], end))
+        else:
+            ranges.append((start, end))
+    return ranges
+
+
+def refine_segments(whisper_model: WhisperModel, audio: Any, segments: List[TranscriptSegment],
+                    thresholds: Tuple[float, float, float], options: Dict[str, Any],
+                    cancel_token: CancellationToken, label: str = "再デコード",
+                    detector: Optional[RepetitionDetector] = None) -> Optional[List[TranscriptSegment]]:
+    """低信頼の時間範囲だけを再デコードし、結果を差し替える
+    
+    Args:
+        whisper_model: 再デコードに使用するモデル
+        audio: 16kHzの音声データ（int16のメモリマップまたはfloat32の配列）、
+            またはファイルパス（対象の範囲だけをFFmpegでデコードする）
+        segments: 1回目の文字起こし結果
+        thresholds: 低信頼と判定する閾値（対数確率、圧縮率、非音声確率）
+        options: 再デコードでtranscribeに渡すオプション
+        cancel_token: キャンセルトークン
+        label: ログに表示する処理名
+        detector: 繰り返しループの検出器
+        
+    Returns:
+        差し替え後のセグメントのリスト、または中断された場合はNone
+    """
+    ranges = find_refine_ranges(segments, thresholds)
+    low_confidence = sum(1 for segment in segments if is_low_confidence(segment, thresholds))
+    if not ranges:
+        logger.info(f"🔍 {label}: 対象となる低信頼のセグメントはありません（{len(segments)}セグメント中 0）")
+        return segments
+    
+    total = segments[-1].end if isinstance(audio, str) else len(audio) / SAMPLING_RATE
+    refined_seconds = sum(min(end, total) - start for start, end in ranges)
+    logger.info(f"🔍 {label}: {len(segments)}セグメント中 {low_confidence} が品質検査に不合格、"
+                f"{len(ranges)}範囲（{format_time(refined_seconds)} / {format_time(total)}）をデコードし直します")
+    
+    result = []
+    remaining = iter(segments)
+    pending = next(remaining, None)
+    for index, (start, end) in enumerate(ranges, 1):
+        # 範囲より前のセグメントはそのまま残し、範囲に中心が含まれるセグメントは差し替える
+        while pending is not None and (pending.start + pending.end) / 2 < start:
+            result.append(pending)
+            pending = next(remaining, None)
+        replaced = []
+        while pending is not None and (pending.start + pending.end) / 2 <= end:
+            replaced.append(pending)
+            pending = next(remaining, None)
+        
+        if isinstance(audio, str):
+            window = decode_audio_range(audio, start, end)
+            if window is None:
+                # デコードできなかった範囲は1回目の結果をそのまま使う
+                result.extend(replaced)
+                continue
+        else:
+            window = audio[int(start * SAMPLING_RATE):int(end * SAMPLING_RATE)]
+        window = to_float_audio(window)
+        refined = transcribe_audio(whisper_model, window, options, cancel_token,
+                                   offset=start, label=f" [{label} {index}/{len(ranges)}]", detector=detector)
+        if refined is None:
+            return None
+        result.extend(refined)
+    
+    while pending is not None:
+        result.append(pending)
+        pending = next(remaining, None)
+    return result
+
+
+def is_live_recording(file_path: str, config: Dict[str, Any]) -> bool:
+    """ライブモードで文字起こしする録音中のファイルかどうか（最近まで書き込まれているか）"""
+    file_watcher_config = config["file_watcher"]
+    if not file_watcher_config.get("live_mode", False):
+        return False
+    ext = os.path.splitext(file_path)[-1].lower()
+    if ext not in file_watcher_config.get("live_extensions", [".wav", ".mp3", ".flac", ".ogg", ".webm", ".mkv"]):
+        return False
+    try:
+        stat = os.stat(file_path)
+    except OSError:
+        return False
+    if time.time() - stat.st_mtime >= float(file_watcher_config.get("live_idle_timeout", 30)):
+        return False
+    # 更新時刻が新しいだけではコピー直後のファイルと区別できないため、実際に書き足されているかを確かめる
+    time.sleep(float(file_watcher_config.get("live_probe_interval", 2)))
+    try:
+        return os.path.getsize(file_path) > stat.st_size
+    except OSError:
+        return False
+
+
+def transcribe_live(file_path: str, config: Dict[str, Any], transcript_file: str,
+                    cancel_token: Optional[CancellationToken] = None,
+                    model_size: Optional[str] = None, compute_type: Optional[str] = None) -> Optional[Transcript]:
+    """録音中のファイルを追いかけながら文字起こしし、結果を文字起こしファイルに追記する
+    
+    新しい音声がウィンドウ分たまるごとにデコードし、ファイルがlive_idle_timeout秒
+    増えなくなったら録音終了とみなして残りを処理して終了する。
+    
+    Returns:
+        文字起こし結果、または失敗・中断時はNone
+    """
+    cancel_token = cancel_token or service_cancel_token
+    file_watcher_config = config["file_watcher"]
+    idle_timeout = float(file_watcher_config.get("live_idle_timeout", 30))
+    window_seconds = float(file_watcher_config.get("live_window", 30))
+    base_filename = os.path.basename(file_path)
+    whisper_model = None
+    
+    try:
+        whisper_model = model_manager.get(config, model_size, compute_type)
+        if whisper_model is None:
+            return None
+        
+        logger.info(f"🎙️ ライブ文字起こし開始: {base_filename}（{window_seconds:.0f}秒ごとに追記、"
+                    f"{idle_timeout:.0f}秒間更新がなければ終了）")
+        with open(transcript_file, "w", encoding="utf-8") as f:
+            def append_segments(segments: List[TranscriptSegment]):
+                if segments:
+                    f.write(format_segments(segments) + "\n")
+                    f.flush()
+                    logger.info(f"🎙️ ライブ文字起こし: {format_time(segments[-1].end)} まで追記しました")
             
-            if text:
-                result.append(f"[{start_time} -> {end_time}] {text}")
+            segments = transcribe_streaming(whisper_model, file_path, get_transcribe_options(config), window_seconds,
+                                            cancel_token, detector=RepetitionDetector(config),
+                                            follow_timeout=idle_timeout, on_segments=append_segments)
+        if segments is None:
+            return None
         
-        logger.info(f"✅ 文字起こし完了: {os.path.basename(file_path)} - 合計 {segment_count} セグメント処理")
+        # 最後の書き込みから完了までの時間（録音終了を待った時間を含む）
+        latency = time.time() - os.path.getmtime(file_path)
+        logger.info(f"✅ ライブ文字起こし完了: {base_filename} - 合計 {len(segments)} セグメント"
+                    f"（録音の最終更新から {latency:.0f}秒）")
+        return Transcript.from_segments(segments)
+    
+    except (OSError, RuntimeError) as e:
+        logger.error(f"ライブ文字起こしエラー: {e}")
+        return None
+    finally:
+        model_manager.release(whisper_model)
+
+
+def get_transcript_cache_file(file_path: str, config: Dict[str, Any], key_params: Dict[str, Any]) -> Path:
+    """文字起こし結果のキャッシュファイルのパスを取得
+    
+    キーはファイル内容のフィンガープリントと、結果に影響するモデル・デコードのパラメータ。
+    """
+    cache_dir = config.get("processing", {}).get("transcript_cache_directory", "")
+    cache_dir = Path(cache_dir) if cache_dir else CACHE_DIR / "transcripts"
+    key = json.dumps({"fingerprint": get_content_fingerprint(file_path), **key_params},
+                     sort_keys=True, ensure_ascii=False, default=str)
+    return cache_dir / f"{hashlib.sha1(key.encode('utf-8')).hexdigest()}.json"
+
+
+def load_cached_transcript(cache_file: Path) -> Optional[List[TranscriptSegment]]:
+    """キャッシュした文字起こし結果を読み込む（ない場合・壊れている場合はNone）"""
+    try:
+        with open(cache_file, "r", encoding="utf-8") as f:
+            segments = [TranscriptSegment(*segment) for segment in json.load(f)["segments"]]
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+    # LRUのため使用時刻を更新
+    os.utime(cache_file)
+    return segments
+
+
+def save_cached_transcript(cache_file: Path, segments: List[TranscriptSegment], config: Dict[str, Any]):
+    """文字起こし結果をキャッシュに保存し、古いキャッシュを削除"""
+    processing_config = config.get("processing", {})
+    try:
+        cache_file.parent.mkdir(parents=True, exist_ok=True)
+        tmp_file = cache_file.with_name(f"{cache_file.stem}.{os.getpid()}.{threading.get_ident()}.tmp")
+        with open(tmp_file, "w", encoding="utf-8") as f:
+            json.dump({"created_at": datetime.now().isoformat(), "segments": [list(segment) for segment in segments]},
+                      f, ensure_ascii=False)
+        os.replace(tmp_file, cache_file)
+    except OSError as e:
+        logger.warning(f"⚠️ 文字起こし結果のキャッシュに失敗しました: {e}")
+        return
+    
+    max_bytes = int(float(processing_config.get("transcript_cache_max_mb", 256)) * 1024 * 1024)
+    max_age_days = float(processing_config.get("transcript_cache_max_age_days", 90))
+    evict_cache_files(cache_file.parent, "*.json", max_bytes, keep=cache_file, max_age_days=max_age_days)
+
+
+def transcribe_file(file_path: str, config: Dict[str, Any],
+                    cancel_token: Optional[CancellationToken] = None,
+                    model_size: Optional[str] = None, compute_type: Optional[str] = None) -> Optional[Transcript]:
+    """ファイルの文字起こし処理
+    
+    Args:
+        file_path: 文字起こしするファイル
+        config: アプリケーション設定
+        cancel_token: キャンセルトークン
+        model_size: 使用するモデルサイズ（省略時は設定値）
+        compute_type: 使用する計算タイプ（省略時は設定値）
         
-        return "\n".join(result)
+    Returns:
+        文字起こし結果、または失敗・中断時はNone
+    """
+    cancel_token = cancel_token or service_cancel_token
+    transcription_config = config["transcription"]
+    parallel_spans = max(1, int(transcription_config.get("parallel_spans", 1)))
+    checkpoint = None
+    whisper_model = None
+    refine_whisper_model = None
+    
+    try:
+        model_size = model_size or transcription_config["model_size"]
+        compute_type = compute_type or transcription_config["compute_type"]
+        
+        # 2パス方式: 高速なモデルで全体を処理し、低信頼の部分だけを指定のモデルで再デコード
+        refine_model = None
+        if transcription_config.get("two_pass", False):
+            first_pass = (transcription_config.get("two_pass_model", "base"),
+                          transcription_config.get("two_pass_compute_type", "int8"))
+            if first_pass != (model_size, compute_type):
+                refine_model = (model_size, compute_type)
+                model_size, compute_type = first_pass
+        
+        # 言語設定・デコード方式
+        options = get_transcribe_options(config)
+        beam_options = get_transcribe_options(config, beam=True)
+        decoding = transcription_config.get("decoding", "adaptive")
+        logger.info(f"デコード方式: {decoding} (beam_size={options['beam_size']}、"
+                    f"温度 {', '.join(str(t) for t in options['temperature'])})")
+        if options["language"] is None:
+            logger.info("言語は自動検出を使用します。")
+        else:
+            logger.info(f"言語設定: {options['language']}")
+        
+        base_filename = os.path.basename(file_path)
+        # モデル情報を取得
+        device, compute_type = resolve_device(compute_type)
+        
+        # 同じ内容・同じパラメータで文字起こし済みならキャッシュを使用（モデルもロードしない）
+        processing_config = config.get("processing", {})
+        detector_params = {key: transcription_config.get(key) for key in
+                           ("repetition_detection", "repetition_max_repeats", "repetition_similarity",
+                            "repetition_min_chars", "repetition_min_duration", "repetition_compression_ratio",
+                            "repetition_ngram_repeats", "repetition_ngram_min_chars")}
+        cache_file = get_transcript_cache_file(file_path, config, {
+            "model_size": model_size, "compute_type": compute_type, "options": options,
+            "decoding": decoding, "beam_size": beam_options["beam_size"],
+            "refine_model": refine_model,
+            "refine_thresholds": get_refine_thresholds(config) if refine_model else None,
+            "repetition": detector_params,
+        })
+        if processing_config.get("transcript_cache", True):
+            cached = load_cached_transcript(cache_file)
+            if cached is not None:
+                logger.info(f"✅ キャッシュ済みの文字起こし結果を使用します: {base_filename} ({len(cached)} セグメント)")
+                return Transcript.from_segments(cached)
+        
+        # 設定に合ったモデルを取得（未ロード・設定変更時はロード）
+        whisper_model = model_manager.get(config, model_size, compute_type)
+        if whisper_model is None:
+            return None
+        
+        logger.info(f"文字起こし開始: {base_filename} (モデル: {model_size}, デバイス: {device}, 計算タイプ: {compute_type})")
+        if refine_model is not None:
+            logger.info(f"2パス方式: 低信頼の部分を {refine_model[0]}/{refine_model[1]} で再デコードします")
+        
+        # バッチ推論の設定
+        batch_size = int(transcription_config.get("batch_size", 0))
+        if batch_size > 0 and BatchedInferencePipeline is None:
+            logger.warning("インストールされているfaster-whisperはバッチ推論に対応していません（1.1以降が必要）。逐次処理を使用します。")
+            batch_size = 0
+        if batch_size > 0 and not options.get("vad_filter"):
+            # バッチ推論はVADで区切った区間を単位にするため、VADなしでは30秒を超える音声を扱えない
+            logger.warning("VADフィルターが無効なためバッチ推論を使用せず逐次処理します（batch_sizeにはvad_filterが必要です）")
+            batch_size = 0
+        
+        # 文字起こしの実行
+        started = time.perf_counter()
+        audio = file_path
+        num_spans = 1
+        mode = "逐次"
+        
+        duration = None
+        
+        # 音声トラックだけを抽出したキャッシュを使用（失敗した場合は元のファイルをデコード）
+        if processing_config.get("audio_cache", True):
+            pcm_file = extract_audio(file_path, config, cancel_token)
+            if cancel_token.is_cancelled():
+                return None
+            if pcm_file is not None:
+                audio = open_pcm_audio(pcm_file)
+                duration = len(audio) / SAMPLING_RATE
+        
+        if batch_size > 0 or parallel_spans > 1:
+            if isinstance(audio, str):
+                audio = decode_audio(file_path, sampling_rate=SAMPLING_RATE)
+                duration = len(audio) / SAMPLING_RATE
+            
+            if batch_size > 0:
+                # 短いファイルはバッチにするほどの区間がないため逐次処理
+                if duration < float(transcription_config.get("batch_min_duration", 60)):
+                    logger.info(f"音声が短いためバッチ推論を使用せず逐次処理します（{duration:.0f}秒）")
+                    batch_size = 0
+            else:
+                # 長い録音は無音部分で分割して並列に処理
+                min_span = float(transcription_config.get("min_span_duration", 600))
+                num_spans = min(parallel_spans, int(duration // min_span))
+        
+        # 長い録音は固定サイズのウィンドウごとにデコードしてメモリ使用量を一定に保つ
+        streaming_window = float(transcription_config.get("streaming_window", 600))
+        streaming = False
+        if streaming_window > 0 and batch_size == 0 and num_spans <= 1:
+            if duration is None:
+                duration = get_media_duration(file_path)
+            streaming = duration is not None and duration >= float(transcription_config.get("streaming_min_duration", 3600))
+        
+        # セグメントを逐次チェックポイントに書き込み、前回中断していれば続きから再開
+        # （区間並列は区間ごとに順序が前後するため対象外）
+        resumed = []
+        resume_at = 0.0
+        if processing_config.get("checkpoint", True) and num_spans <= 1:
+            checkpoint = TranscriptCheckpoint(CACHE_DIR / "checkpoints" / f"{cache_file.stem}.jsonl",
+                                              float(processing_config.get("checkpoint_fsync_interval", 10)))
+            resumed = checkpoint.load()
+            if resumed:
+                resume_at = resumed[-1].end
+                logger.info(f"🔄 チェックポイントから再開します: {len(resumed)} セグメント、{format_time(resume_at)} 以降を文字起こし")
+                if isinstance(audio, str) and not streaming:
+                    audio = decode_audio(file_path, sampling_rate=SAMPLING_RATE)
+        resume_sample = int(resume_at * SAMPLING_RATE)
+        
+        stats = {}
+        detector = RepetitionDetector(config)
+        if not isinstance(audio, str) and not streaming and resume_sample >= len(audio):
+            # 前回の実行で最後まで文字起こし済み
+            segments = []
+        elif batch_size > 0:
+            # VADで区切った区間をまとめてエンコーダ・デコーダに通す
+            mode = f"バッチ（batch_size={batch_size}）"
+            pipeline = BatchedInferencePipeline(model=whisper_model)
+            segments = transcribe_audio(pipeline, to_float_audio(audio[resume_sample:]), {**options, "batch_size": batch_size},
+                                        cancel_token, offset=resume_at, stats=stats, detector=detector,
+                                        checkpoint=checkpoint)
+        elif num_spans > 1:
+            mode = f"区間並列（{num_spans}区間）"
+            segments = transcribe_in_spans(whisper_model, audio, options, num_spans, cancel_token, stats, detector)
+        elif streaming:
+            mode = f"ストリーミング（ウィンドウ {streaming_window:.0f}秒）"
+            segments = transcribe_streaming(whisper_model, audio, options, streaming_window, cancel_token, stats, detector,
+                                            checkpoint=checkpoint, start_offset=resume_at)
+        else:
+            if not isinstance(audio, str):
+                audio = to_float_audio(audio)
+            segments = transcribe_audio(whisper_model, audio[resume_sample:] if resume_sample else audio, options,
+                                        cancel_token, offset=resume_at, stats=stats, detector=detector,
+                                        checkpoint=checkpoint)
+        if segments is None:
+            return None
+        segments = resumed + segments
+        
+        elapsed = time.perf_counter() - started
+        logger.info(f"✅ 文字起こし完了: {os.path.basename(file_path)} - 合計 {len(segments)} セグメント処理")
+        if stats.get("duration"):
+            # 実時間比（処理時間 / 音声の長さ）で処理方式の速度を比較できるようにする
+            logger.info(f"⏱️ 文字起こし時間: {elapsed:.1f}秒 / 音声 {format_time(stats['duration'])} "
+                        f"(RTF {elapsed / stats['duration']:.3f}、方式: {mode})")
+            record_rtf(model_size, compute_type, elapsed / stats["duration"])
+        if options.get("vad_filter") and stats.get("duration"):
+            skipped = stats["duration"] - stats["duration_after_vad"]
+            logger.info(f"🔇 VADで除外した無音・非音声: {format_time(skipped)} / {format_time(stats['duration'])} "
+                        f"({skipped / stats['duration']:.0%})")
+        
+        if stats.get("repetition_loops"):
+            logger.warning(f"🔁 繰り返しループ: {stats['repetition_loops']:.0f}回検出、"
+                           f"{format_time(stats['repetition_dropped'])} 分のセグメントを破棄しました")
+        
+        # 貪欲法の結果が品質検査に不合格の範囲だけをビームサーチでやり直す
+        # （2パス方式では同じ範囲を大きいモデルで再デコードするため省略する）。
+        # 音声がメモリにない場合（ストリーミングなど）は、対象の範囲だけをファイルからデコードする
+        if decoding == "adaptive" and refine_model is None and segments and beam_options["beam_size"] > 1:
+            fallback_started = time.perf_counter()
+            segments = refine_segments(whisper_model, audio, segments, get_fallback_thresholds(config),
+                                       beam_options, cancel_token, label="ビームサーチへのフォールバック",
+                                       detector=detector)
+            if segments is None:
+                return None
+            logger.info(f"⏱️ フォールバック時間: {time.perf_counter() - fallback_started:.1f}秒")
+        
+        if refine_model is not None and segments:
+            refine_whisper_model = model_manager.get(config, *refine_model)
+            if refine_whisper_model is None:
+                return None
+            refine_started = time.perf_counter()
+            segments = refine_segments(refine_whisper_model, audio, segments, get_refine_thresholds(config),
+                                       beam_options, cancel_token, detector=detector)
+            if segments is None:
+                return None
+            logger.info(f"⏱️ 再デコード時間: {time.perf_counter() - refine_started:.1f}秒")
+        
+        if processing_config.get("transcript_cache", True):
+            save_cached_transcript(cache_file, segments, config)
+        if checkpoint is not None:
+            checkpoint.remove()
+            evict_cache_files(checkpoint.path.parent, "*.jsonl", None,
+                              max_age_days=float(processing_config.get("transcript_cache_max_age_days", 90)))
+        return Transcript.from_segments(segments)
     
     except FileNotFoundError:
         logger.error(f"ファイルが見つかりません: {file_path}")
@@ -499,6 +2402,12 @@ def transcribe_file(file_path: str, config: Dict[str, Any]) -> Optional[str]:
     except Exception as e:
         logger.error(f"文字起こし処理エラー: {e}")
         return None
+    finally:
+        if checkpoint is not None:
+            checkpoint.close()
+        # 使い終わったモデルを解放可能にする
+        model_manager.release(whisper_model)
+        model_manager.release(refine_whisper_model)
 
 
 def format_time(seconds: float) -> str:
@@ -508,101 +2417,161 @@ def format_time(seconds: float) -> str:
     return f"{int(hours):02d}:{int(minutes):02d}:{int(seconds):02d}"
 
 
-def split_transcription(transcription: str, chunk_size: int = 5000) -> List[Dict[str, Any]]:
-    """文字起こしをチャンクに分割
+def get_model_capabilities(llm_config: Dict[str, Any]) -> Dict[str, Any]:
+    """LLMモデルのコンテキスト長・最大出力トークン数・トークナイザーを取得
+    
+    llm.context_window・llm.max_output_tokensを指定した場合はその値を優先する。
+    """
+    provider = llm_config.get("api_type", "openai").lower()
+    model = llm_config.get("model", "").lower()
+    context_window, max_output, tokenizer = DEFAULT_MODEL_CAPABILITIES.get(provider, DEFAULT_MODEL_CAPABILITIES["openai"])
+    
+    matches = [row for row in MODEL_CAPABILITIES if row[0] == provider and model.startswith(row[1])]
+    if matches:
+        _, _, context_window, max_output, tokenizer = max(matches, key=lambda row: len(row[1]))
+    
+    return {
+        "context_window": int(llm_config.get("context_window", 0)) or context_window,
+        "max_output": int(llm_config.get("max_output_tokens", 0)) or max_output,
+        "tokenizer": tokenizer,
+    }
+
+
+@functools.lru_cache(maxsize=None)
+def get_tiktoken_encoding(tokenizer: str) -> Any:
+    """tiktokenのエンコーディングを取得（利用できない場合はNone）"""
+    if tiktoken is None or tokenizer not in ("o200k", "cl100k"):
+        return None
+    try:
+        return tiktoken.get_encoding(f"{tokenizer}_base")
+    except Exception:
+        return None
+
+
+def estimate_tokens(text: str, tokenizer: str) -> int:
+    """テキストのトークン数を見積もる
+    
+    tiktokenが使える場合は正確に数え、それ以外は全角文字とそれ以外の文字数から
+    トークナイザーごとの目安で推定する（超過を避けるため多めに見積もる）。
+    """
+    encoding = get_tiktoken_encoding(tokenizer)
+    if encoding is not None:
+        return len(encoding.encode(text, disallowed_special=()))
+    
+    wide_rate, narrow_rate = TOKENS_PER_CHAR.get(tokenizer, TOKENS_PER_CHAR["claude"])
+    narrow = len(WIDE_CHAR_PATTERN.sub("", text))
+    return int((len(text) - narrow) * wide_rate + narrow * narrow_rate) + 1
+
+
+def get_max_output_tokens(prompt: str, llm_config: Dict[str, Any], system_prompt: str = "") -> int:
+    """1回の呼び出しのmax_tokensを決定
+    
+    設定値をモデルの最大出力トークン数と、プロンプトを除いたコンテキストの残りで制限する。
+    """
+    capabilities = get_model_capabilities(llm_config)
+    prompt_tokens = estimate_tokens(system_prompt + prompt, capabilities["tokenizer"])
+    available = capabilities["context_window"] - prompt_tokens
+    max_tokens = min(int(llm_config.get("max_tokens", 4096)), capabilities["max_output"], available)
+    if available < 1:
+        logger.warning(f"⚠️ プロンプト（約{prompt_tokens}トークン）がモデルのコンテキスト長"
+                       f"（{capabilities['context_window']}）を超えています")
+    elif max_tokens < int(llm_config.get("max_tokens", 4096)):
+        logger.info(f"max_tokensを {max_tokens} に制限します（プロンプト 約{prompt_tokens}トークン、"
+                    f"コンテキスト {capabilities['context_window']}、最大出力 {capabilities['max_output']}）")
+    return max(1, max_tokens)
+
+
+def get_input_token_budget(config: Dict[str, Any], prompt_overhead: str = "") -> int:
+    """プロンプトに入れる文字起こしのトークン数の上限
+    
+    コンテキスト長から出力用のトークンとテンプレート部分を除き、推定誤差の余裕（5%）を残す。
+    processing.chunk_tokensを指定した場合はその値で制限する。
+    """
+    llm_config = config.get("llm", {})
+    capabilities = get_model_capabilities(llm_config)
+    output_tokens = min(int(llm_config.get("max_tokens", 4096)), capabilities["max_output"])
+    overhead_tokens = estimate_tokens(prompt_overhead, capabilities["tokenizer"])
+    budget = int(capabilities["context_window"] * 0.95) - output_tokens - overhead_tokens
+    
+    chunk_tokens = int(config.get("processing", {}).get("chunk_tokens", 0))
+    if chunk_tokens > 0:
+        budget = min(budget, chunk_tokens)
+    return max(1000, budget)
+
+
+def get_prompt_overhead(config: Dict[str, Any]) -> str:
+    """文字起こし以外のプロンプト部分（テンプレート・システムプロンプト・パート情報の分の余裕）"""
+    template_name = config["llm"].get("selected_template", "default")
+    template = config["prompt_templates"].get(template_name) or config["prompt_templates"]["default"]
+    return template.replace("{transcription}", "") + SYSTEM_PROMPT + "\n\n注: これは会議記録 第00部（00:00:00～00:00:00）の要約です。"
+
+
+def get_line_tokens(transcript: Transcript, tokenizer: str) -> List[int]:
+    """各セグメントをテキスト形式にした1行（時刻部分と改行を含む）のトークン数"""
+    time_tokens = estimate_tokens("[00:00:00 -> 00:00:00] \n", tokenizer)
+    return [estimate_tokens(text, tokenizer) + time_tokens for text in transcript.texts]
+
+
+def split_transcription(transcript: Transcript, max_tokens: int, tokenizer: str = "o200k") -> List[Dict[str, Any]]:
+    """文字起こしをセグメントの区切りでトークン数の上限以下のチャンクに分割
+    
+    必要なチャンク数を求めてから、各チャンクがほぼ同じトークン数になるよう分割する。
     
     Args:
-        transcription: 文字起こしテキスト
-        chunk_size: 各チャンクの最大文字数（デフォルト: 5000文字）
+        transcript: 文字起こし結果
+        max_tokens: 各チャンクの最大トークン数
+        tokenizer: トークン数の見積もりに使うトークナイザー
         
     Returns:
         分割されたチャンクのリスト。各チャンクは辞書形式で、
-        index, start_time, end_time, contentキーを持つ
+        index, start, end（秒）, start_time, end_time（HH:MM:SS）, tokens, contentキーを持つ
     """
-    lines = transcription.split("\n")
+    line_tokens = get_line_tokens(transcript, tokenizer)
+    total = sum(line_tokens)
+    num_chunks = max(1, -(-total // max_tokens))
+    target = min(max_tokens, -(-total // num_chunks))
+    
     chunks = []
-    current_chunk = []
-    current_size = 0
-    chunk_index = 1
-    
-    # 時間情報を抽出するための正規表現
-    time_pattern = r"\[(\d{2}:\d{2}:\d{2})"
-    
-    start_time = None
-    end_time = None
-    
-    for line in lines:
-        line_size = len(line) + 1  # 改行文字を考慮
-        
-        # 最初の行から開始時間を抽出
-        if not start_time and line:
-            start_match = re.search(time_pattern, line)
-            if start_match:
-                start_time = start_match.group(1)
-        
-        # チャンクサイズを超える場合、新しいチャンクを開始
-        if current_size + line_size > chunk_size and current_chunk:
-            # 最後の行から終了時間を抽出
-            if current_chunk[-1]:
-                end_match = re.search(time_pattern, current_chunk[-1])
-                if end_match:
-                    end_time = end_match.group(1)
-            
-            # チャンク情報を追加
+    lo = 0
+    current_tokens = 0
+    
+    for i in range(len(transcript) + 1):
+        tokens = line_tokens[i] if i < len(transcript) else 0
+        
+        # 目標のトークン数を超える場合（または最後）、それまでのセグメントでチャンクを作成
+        if i > lo and (i == len(transcript) or current_tokens + tokens > target):
             chunks.append({
-                "index": chunk_index,
-                "start_time": start_time or "00:00:00.000",
-                "end_time": end_time or "unknown",
-                "content": "\n".join(current_chunk)
+                "index": len(chunks) + 1,
+                "start": transcript.starts[lo],
+                "end": transcript.ends[i - 1],
+                "start_time": format_time(transcript.starts[lo]),
+                "end_time": format_time(transcript.ends[i - 1]),
+                "tokens": current_tokens,
+                "content": transcript.format(lo, i)
             })
-            
-            # 新しいチャンクの準備
-            current_chunk = []
-            current_size = 0
-            chunk_index += 1
-            # 次のチャンクの開始時間は、現在の終了時間から始まる
-            start_time = end_time
-            end_time = None
-        
-        current_chunk.append(line)
-        current_size += line_size
-    
-    # 最後のチャンクを処理
-    if current_chunk:
-        if current_chunk[-1]:
-            end_match = re.search(time_pattern, current_chunk[-1])
-            if end_match:
-                end_time = end_match.group(1)
-        
-        chunks.append({
-            "index": chunk_index,
-            "start_time": start_time or "00:00:00.000",
-            "end_time": end_time or "unknown",
-            "content": "\n".join(current_chunk)
-        })
+            lo = i
+            current_tokens = 0
+        current_tokens += tokens
     
     # チャンク情報をログに出力
     for chunk in chunks:
-        start_time = chunk['start_time'] if chunk['start_time'] != "unknown" else "00:00:00"
-        end_time = chunk['end_time'] if chunk['end_time'] != "unknown" else "最後まで"
-        logger.info(f"チャンク {chunk['index']}: {start_time} -> {end_time}, サイズ: {len(chunk['content'])}文字")
+        logger.info(f"チャンク {chunk['index']}: {chunk['start_time']} -> {chunk['end_time']}, "
+                    f"約{chunk['tokens']}トークン（{len(chunk['content'])}文字）")
     
     return chunks
 
 
-def is_long_transcription(transcription: str, config: Dict[str, Any]) -> bool:
+def is_long_transcription(transcription: Transcript, config: Dict[str, Any]) -> bool:
     """文字起こしが長いかどうかを判定する
     
     Args:
-        transcription: 判定する文字起こしテキスト
+        transcription: 判定する文字起こし結果
         config: アプリケーション設定
         
     Returns:
-        True: 長い文字起こしと判定された場合
-        False: 通常の長さと判定された場合
+        True: 1回の呼び出しのトークン数の上限を超える場合
+        False: 1回の呼び出しで処理できる場合
     """
-    # 文字数で判定
-    char_count = len(transcription)
     processing_config = config.get("processing", {})
     
     # chunking が有効かどうか確認
@@ -611,53 +2580,31 @@ def is_long_transcription(transcription: str, config: Dict[str, Any]) -> bool:
         logger.info("分割処理が無効に設定されています。標準処理を使用します。")
         return False
     
-    # 選択されたLLMモデルの情報を取得
+    # 選択されたLLMモデルのコンテキストに収まるかをトークン数で判定
     llm_config = config.get("llm", {})
-    model_name = llm_config.get("model", "").lower()
-    api_type = llm_config.get("api_type", "openai").lower()
-    
-    # モデルに基づいて閾値を調整
-    chunk_size = processing_config.get("chunk_size", 12000)
-    threshold_multiplier = 3  # デフォルトの閾値乗数
-    
-    # モデル特性に基づく調整
-    if api_type == "openai":
-        if "gpt-4o" in model_name or "gpt-4-turbo" in model_name:
-            # GPT-4oやGPT-4-turboはより大きなコンテキストを処理可能
-            threshold_multiplier = 3
-        elif "gpt-3.5" in model_name:
-            # GPT-3.5は小さめのコンテキスト
-            threshold_multiplier = 2.5
-    elif api_type == "anthropic":
-        if "opus" in model_name:
-            threshold_multiplier = 3.5
-        elif "sonnet" in model_name:
-            threshold_multiplier = 3
-        else:  # haiku等
-            threshold_multiplier = 2.5
-    elif api_type == "google":
-        if "1.5-pro" in model_name:
-            threshold_multiplier = 3.5
-        else:
-            threshold_multiplier = 3
-    
-    # チャンクサイズと乗数に基づいて閾値を計算
-    threshold = int(chunk_size * threshold_multiplier)
-    is_long = char_count > threshold
+    capabilities = get_model_capabilities(llm_config)
+    tokens = sum(get_line_tokens(transcription, capabilities["tokenizer"]))
+    budget = get_input_token_budget(config, get_prompt_overhead(config))
+    is_long = tokens > budget
     
     if is_long:
-        logger.info(f"長い文字起こしを検出: 約{char_count}文字（閾値: {threshold}文字、モデル: {model_name}）")
-    
+        logger.info(f"長い文字起こしを検出: 約{tokens}トークン（上限: {budget}トークン、"
+                    f"モデル: {llm_config.get('model', '')}）")
     return is_long
 
 
-def call_llm_api(transcription: str, config: Dict[str, Any]) -> Optional[str]:
-    """LLM APIを呼び出して議事録を生成"""
+def call_llm_api(transcription: Transcript, config: Dict[str, Any],
+                 cancel_token: Optional[CancellationToken] = None,
+                 on_text: Optional[Callable[[str], None]] = None) -> Optional[str]:
+    """LLM APIを呼び出して議事録を生成
+    
+    on_textを指定した場合は、議事録の本文（分割処理では全体要約）を生成されたそばから渡す。
+    """
     try:
         # 長い文字起こしかどうかをチェック
         if is_long_transcription(transcription, config):
             logger.info("長い文字起こしを検出したため、分割処理を適用します")
-            return process_chunked_transcription(transcription, config)
+            return process_chunked_transcription(transcription, config, cancel_token, on_text)
             
         # 通常の処理（短い文字起こし）
         llm_config = config["llm"]
@@ -670,17 +2617,17 @@ def call_llm_api(transcription: str, config: Dict[str, Any]) -> Optional[str]:
             logger.warning(f"指定されたテンプレート '{template_name}' が見つかりません。デフォルトを使用します。")
         
         template = config["prompt_templates"][template_name]
-        prompt = template.replace("{transcription}", transcription)
+        prompt = template.replace("{transcription}", transcription.format())
         
         logger.info(f"LLM API ({api_type}) 呼び出し開始 - テンプレート: {template_name}")
         
         result = None
         if api_type == "openai":
-            result = call_openai_api(prompt, llm_config)
+            result = call_openai_api(prompt, llm_config, cancel_token, on_text)
         elif api_type == "anthropic":
-            result = call_anthropic_api(prompt, llm_config)
+            result = call_anthropic_api(prompt, llm_config, cancel_token, on_text)
         elif api_type == "google":
-            result = call_google_api(prompt, llm_config)
+            result = call_google_api(prompt, llm_config, cancel_token, on_text)
         else:
             logger.error(f"サポートされていないAPI種類: {api_type}")
             return None
@@ -697,12 +2644,14 @@ def call_llm_api(transcription: str, config: Dict[str, Any]) -> Optional[str]:
         return None
 
 
-def call_llm_api_for_chunk(chunk: Dict[str, Any], config: Dict[str, Any]) -> Optional[str]:
+def call_llm_api_for_chunk(chunk: Dict[str, Any], config: Dict[str, Any],
+                           cancel_token: Optional[CancellationToken] = None) -> Optional[str]:
     """チャンク用のLLM API呼び出し
     
     Args:
         chunk: 処理するチャンク情報（index, start_time, end_time, content）
         config: アプリケーション設定
+        cancel_token: キャンセルトークン
         
     Returns:
         要約結果テキスト、または失敗時はNone
@@ -719,10 +2668,8 @@ def call_llm_api_for_chunk(chunk: Dict[str, Any], config: Dict[str, Any]) -> Opt
         
         template = config["prompt_templates"][template_name]
         
-        # チャンク情報を組み込んだプロンプトを作成（タイムスタンプ部分の表示を保証するための処理）
-        start_time = chunk['start_time'] if chunk['start_time'] != "unknown" else "00:00:00"
-        end_time = chunk['end_time'] if chunk['end_time'] != "unknown" else "最後まで"
-        part_info = f"会議記録 第{chunk['index']}部（{start_time}～{end_time}）"
+        # チャンク情報を組み込んだプロンプトを作成
+        part_info = f"会議記録 第{chunk['index']}部（{chunk['start_time']}～{chunk['end_time']}）"
         
         # テンプレートにチャンク情報を追加
         modified_template = f"{template}\n\n注: これは{part_info}の要約です。"
@@ -733,11 +2680,11 @@ def call_llm_api_for_chunk(chunk: Dict[str, Any], config: Dict[str, Any]) -> Opt
         # 通常のLLM API呼び出し処理を実行
         result = None
         if api_type == "openai":
-            result = call_openai_api(prompt, llm_config)
+            result = call_openai_api(prompt, llm_config, cancel_token)
         elif api_type == "anthropic":
-            result = call_anthropic_api(prompt, llm_config)
+            result = call_anthropic_api(prompt, llm_config, cancel_token)
         elif api_type == "google":
-            result = call_google_api(prompt, llm_config)
+            result = call_google_api(prompt, llm_config, cancel_token)
         else:
             logger.error(f"サポートされていないAPI種類: {api_type}")
             return None
@@ -756,32 +2703,63 @@ def call_llm_api_for_chunk(chunk: Dict[str, Any], config: Dict[str, Any]) -> Opt
         return None
 
 
-def process_chunked_transcription(transcription: str, config: Dict[str, Any]) -> Optional[str]:
+def process_chunked_transcription(transcription: Transcript, config: Dict[str, Any],
+                                  cancel_token: Optional[CancellationToken] = None,
+                                  on_text: Optional[Callable[[str], None]] = None) -> Optional[str]:
     """長い文字起こしの分割処理
     
     Args:
-        transcription: 文字起こしテキスト全体
+        transcription: 文字起こし結果全体
         config: アプリケーション設定
+        cancel_token: キャンセルトークン
+        on_text: 生成中のテキストを受け取る関数（二段階要約では全体要約、
+            それ以外は完成したチャンクの要約をチャンク番号順に受け取る）
         
     Returns:
         処理結果の要約テキスト、または失敗時はNone
     """
-    # 設定から分割サイズを取得
+    # モデルのトークン数の上限から分割サイズを決定
     processing_config = config.get("processing", {})
-    chunk_size = processing_config.get("chunk_size", 5000)
+    capabilities = get_model_capabilities(config["llm"])
+    chunk_tokens = get_input_token_budget(config, get_prompt_overhead(config))
     
     # 文字起こしを分割
-    chunks = split_transcription(transcription, chunk_size)
+    chunks = split_transcription(transcription, chunk_tokens, capabilities["tokenizer"])
     logger.info(f"文字起こしを {len(chunks)} チャンクに分割しました")
     
-    # 各チャンクを処理
+    # 各チャンクを並列に処理（同時実行数は設定で制限）
+    max_parallel = max(1, int(processing_config.get("max_parallel_chunks", 4)))
+    max_parallel = min(max_parallel, len(chunks)) or 1
+    logger.info(f"チャンク要約を最大 {max_parallel} 並列で実行します")
+    two_stage = processing_config.get("two_stage_summary", False) and len(chunks) > 1
+    
     chunk_summaries = []
-    for chunk in chunks:
-        summary = call_llm_api_for_chunk(chunk, config)
-        if summary:
-            chunk_summaries.append(summary)
-        else:
-            logger.warning(f"⚠️ チャンク {chunk['index']} の要約に失敗しました")
+    with ThreadPoolExecutor(max_workers=max_parallel, thread_name_prefix="chunk") as executor:
+        futures = {
+            chunk["index"]: executor.submit(call_llm_api_for_chunk, chunk, config, cancel_token)
+            for chunk in chunks
+        }
+        
+        # チャンク番号順に完了を待って結果を再構成し、先頭から順に書き出す
+        for chunk in sorted(chunks, key=lambda c: c["index"]):
+            try:
+                summary = futures[chunk["index"]].result()
+            except Exception as e:
+                logger.error(f"❌ チャンク {chunk['index']} の処理中に例外が発生しました: {e}")
+                summary = None
+            
+            if summary:
+                if on_text is not None and not two_stage:
+                    # 結合後の議事録と同じ区切りで書き出す
+                    on_text(f"\n\n{summary}" if chunk_summaries else summary)
+                chunk_summaries.append(summary)
+            else:
+                logger.warning(f"⚠️ チャンク {chunk['index']} の要約に失敗しました")
+    
+    # キャンセルされた場合は部分的な結果を返さない
+    if cancel_token is not None and cancel_token.is_cancelled():
+        logger.warning(f"⚠️ チャンク処理を中断しました: {cancel_token.reason}")
+        return None
     
     # すべてのチャンクが処理失敗した場合
     if not chunk_summaries:
@@ -792,11 +2770,11 @@ def process_chunked_transcription(transcription: str, config: Dict[str, Any]) ->
     combined_summary = "\n\n".join(chunk_summaries)
     
     # 二段階要約が有効な場合は全体要約を生成
-    if processing_config.get("two_stage_summary", False) and len(chunks) > 1:
+    if two_stage:
         logger.info("全体要約を生成します...")
         
         # 各チャンクの要約をまとめた全体要約を生成
-        overall_summary = create_overall_summary(chunk_summaries, config)
+        overall_summary = create_overall_summary(chunk_summaries, config, cancel_token, on_text)
         if overall_summary:
             combined_summary = f"# 会議全体の要約\n\n{overall_summary}\n\n# チャンク別詳細\n\n{combined_summary}"
             logger.info("全体要約の生成が完了しました")
@@ -805,26 +2783,17 @@ def process_chunked_transcription(transcription: str, config: Dict[str, Any]) ->
     
     return combined_summary
 
-def create_overall_summary(chunk_summaries: List[str], config: Dict[str, Any]) -> Optional[str]:
-    """各チャンクの要約から全体要約を生成する
-    
-    Args:
-        chunk_summaries: 各チャンクの要約テキストのリスト
-        config: アプリケーション設定
-        
-    Returns:
-        全体要約テキスト、または失敗時はNone
-    """
-    try:
-        llm_config = config["llm"]
-        api_type = llm_config["api_type"]
-        
-        # すべてのチャンク要約を組み合わせたテキスト
-        combined_text = "\n\n".join(chunk_summaries)
-        
-        # 全体要約用のプロンプト
-        prompt = f"""
-以下は会議の各パートの要約です。これらの要約を統合して、会議全体の簡潔な要約を生成してください。
+def build_merge_prompt(combined_text: str, final: bool = True) -> str:
+    """パートの要約を統合するプロンプトを作成（finalがFalseの場合は途中段階の統合）"""
+    if final:
+        instruction = "以下は会議の各パートの要約です。これらの要約を統合して、会議全体の簡潔な要約を生成してください。"
+        request = "以下の会議パート要約から全体要約を作成してください："
+    else:
+        instruction = ("以下は会議の連続するパートの要約です。後でさらに他のパートと統合するため、"
+                       "これらをひとつの要約に統合してください。時系列と重要な詳細は残してください。")
+        request = "以下の会議パート要約を統合してください："
+    return f"""
+{instruction}
 
 重要な点：
 - 全体の流れを把握できるようにする
@@ -832,38 +2801,685 @@ def create_overall_summary(chunk_summaries: List[str], config: Dict[str, Any]) -
 - 矛盾する情報があれば調整して一貫性のある要約にする
 - 重複内容は一度だけ記載する
 
-以下の会議パート要約から全体要約を作成してください：
+{request}
 
 {combined_text}
 """
+
+
+def merge_summaries(summaries: List[str], config: Dict[str, Any], label: str, final: bool = True,
+                    cancel_token: Optional[CancellationToken] = None,
+                    on_text: Optional[Callable[[str], None]] = None) -> Optional[str]:
+    """複数の要約をLLMで1つに統合する
+    
+    Args:
+        summaries: 統合する要約テキストのリスト（時系列順）
+        config: アプリケーション設定
+        label: ログに表示する名前
+        final: 最終段階（会議全体の要約）かどうか
+        cancel_token: キャンセルトークン
+        on_text: 生成中のテキストを受け取る関数
+        
+    Returns:
+        統合した要約テキスト、または失敗時はNone
+    """
+    try:
+        llm_config = config["llm"]
+        api_type = llm_config["api_type"]
+        prompt = build_merge_prompt("\n\n".join(summaries), final)
         
-        logger.info(f"全体要約のLLM API ({api_type}) 呼び出し開始")
+        logger.info(f"{label}のLLM API ({api_type}) 呼び出し開始（{len(summaries)}件）")
         
         # LLM API呼び出し
         result = None
         if api_type == "openai":
-            result = call_openai_api(prompt, llm_config)
+            result = call_openai_api(prompt, llm_config, cancel_token, on_text)
         elif api_type == "anthropic":
-            result = call_anthropic_api(prompt, llm_config)
+            result = call_anthropic_api(prompt, llm_config, cancel_token, on_text)
         elif api_type == "google":
-            result = call_google_api(prompt, llm_config)
+            result = call_google_api(prompt, llm_config, cancel_token, on_text)
         else:
             logger.error(f"サポートされていないAPI種類: {api_type}")
             return None
         
         if result:
-            logger.info(f"✅ 全体要約の生成完了: 約{len(result)}文字の応答を受信")
+            logger.info(f"✅ {label}の生成完了: 約{len(result)}文字の応答を受信")
             return result
         else:
-            logger.error("❌ 全体要約の生成に失敗しました")
+            logger.error(f"❌ {label}の生成に失敗しました")
             return None
     
     except Exception as e:
-        logger.error(f"❌ 全体要約の生成エラー: {e}")
+        logger.error(f"❌ {label}の生成エラー: {e}")
+        return None
+
+
+def group_summaries(tokens: List[int], budget: int, fan_in: int) -> List[Tuple[int, int]]:
+    """連続する要約を、トークン数の上限とグループあたりの件数の上限以下のグループに分ける
+    
+    各グループがほぼ同じトークン数になるよう、必要なグループ数から目標を決めて分割する。
+    上限を超えるグループは作らないため、1件だけのグループ（統合せずそのまま次の段階へ
+    渡す）もできる。1件で上限を超える要約は、その1件だけのグループになる。
+    
+    Returns:
+        グループごとの(開始番号, 終了番号)のリスト
+    """
+    total = sum(tokens)
+    num_groups = max(-(-total // budget), -(-len(tokens) // fan_in), 1)
+    target = -(-total // num_groups)
+    
+    groups = []
+    lo = 0
+    current = 0
+    for i, count in enumerate(tokens):
+        if i > lo and (current >= target or current + count > budget or i - lo >= fan_in):
+            groups.append((lo, i))
+            lo = i
+            current = 0
+        current += count
+    groups.append((lo, len(tokens)))
+    return groups
+
+
+def truncate_to_tokens(text: str, max_tokens: int, tokenizer: str) -> str:
+    """見積もりトークン数が上限以下になるようテキストの末尾を切り詰める"""
+    tokens = estimate_tokens(text, tokenizer)
+    while tokens > max_tokens and text:
+        text = text[:int(len(text) * max_tokens / tokens * 0.95)]
+        tokens = estimate_tokens(text, tokenizer)
+    return text
+
+
+def create_overall_summary(chunk_summaries: List[str], config: Dict[str, Any],
+                           cancel_token: Optional[CancellationToken] = None,
+                           on_text: Optional[Callable[[str], None]] = None) -> Optional[str]:
+    """各チャンクの要約から全体要約を生成する
+    
+    要約の合計が1回の呼び出しの上限を超える場合は、連続する要約をグループごとに
+    並列に統合し、1回で統合できる量になるまで段階的に繰り返す（ツリー型の統合）。
+    
+    Args:
+        chunk_summaries: 各チャンクの要約テキストのリスト
+        config: アプリケーション設定
+        cancel_token: キャンセルトークン
+        on_text: 最終段階の生成中のテキストを受け取る関数
+        
+    Returns:
+        全体要約テキスト、または失敗時はNone
+    """
+    processing_config = config.get("processing", {})
+    tokenizer = get_model_capabilities(config["llm"])["tokenizer"]
+    budget = get_input_token_budget(config, build_merge_prompt(""))
+    # 1回に統合する要約の件数の上限（0の場合はトークン数だけで決める）
+    fan_in = int(processing_config.get("summary_fan_in", 0)) or len(chunk_summaries)
+    fan_in = max(2, fan_in)
+    max_parallel = max(1, int(processing_config.get("max_parallel_chunks", 4)))
+    
+    summaries = list(chunk_summaries)
+    # 各要約が含むチャンクの範囲（見出しに使用）
+    ranges = [(i, i + 1) for i in range(len(summaries))]
+    level = 1
+    while processing_config.get("tree_reduce", True):
+        tokens = [estimate_tokens(summary, tokenizer) for summary in summaries]
+        if sum(tokens) <= budget and len(summaries) <= fan_in:
+            break
+        
+        groups = group_summaries(tokens, budget, fan_in)
+        if all(hi - lo == 1 for lo, hi in groups):
+            # 隣り合う2件でも上限を超える場合は、長い要約を切り詰めてから統合する
+            limit = budget // 2 if len(summaries) > 1 else budget
+            logger.warning(f"⚠️ 要約が長く統合の上限（{budget}トークン）に収まらないため、"
+                           f"約{limit}トークンを超える要約の末尾を切り詰めます")
+            summaries = [truncate_to_tokens(summary, limit, tokenizer) if count > limit else summary
+                         for summary, count in zip(summaries, tokens)]
+            continue
+        
+        logger.info(f"🌲 要約の統合 第{level}段: {len(summaries)}件（約{sum(tokens)}トークン）を"
+                    f"{len(groups)}グループに統合します（上限 {budget}トークン）")
+        
+        # 1件だけのグループは統合せずにそのまま次の段階へ渡す
+        with ThreadPoolExecutor(max_workers=min(max_parallel, len(groups)), thread_name_prefix="merge") as executor:
+            futures = [
+                executor.submit(merge_summaries, summaries[lo:hi], config,
+                                f"要約の統合（第{level}段 グループ{index}）", False, cancel_token)
+                if hi - lo > 1 else None
+                for index, (lo, hi) in enumerate(groups, 1)
+            ]
+        
+        merged = []
+        merged_ranges = []
+        for (lo, hi), future in zip(groups, futures):
+            if future is None:
+                merged.append(summaries[lo])
+                merged_ranges.append(ranges[lo])
+                continue
+            try:
+                result = future.result()
+            except Exception as e:
+                logger.error(f"❌ 要約の統合中に例外が発生しました: {e}")
+                result = None
+            if not result:
+                return None
+            first, last = ranges[lo][0] + 1, ranges[hi - 1][1]
+            merged.append(f"## 会議記録 第{first}～{last}部の要約\n\n{result}")
+            merged_ranges.append((first - 1, last))
+        
+        if cancel_token is not None and cancel_token.is_cancelled():
+            return None
+        summaries = merged
+        ranges = merged_ranges
+        level += 1
+    
+    return merge_summaries(summaries, config, "全体要約", True, cancel_token, on_text)
+
+
+class LlmRateLimiter:
+    """LLMプロバイダー・モデルごとのレート制限と同時実行数の制御（全ワーカーで共有）
+    
+    リクエスト数とトークン数の2つのトークンバケットで1分あたりの上限を守る。
+    同時実行数はAIMDで調整し、応答が健全な間は少しずつ増やし、
+    429や遅延の急増があれば半分に減らしてリトライの集中を防ぐ。
+    """
+    
+    def __init__(self, label: str):
+        self.label = label
+        self.condition = threading.Condition()
+        self.requests_per_minute = 0.0
+        self.tokens_per_minute = 0.0
+        self.max_concurrency = 1
+        self.latency_spike_factor = 3.0
+        self.request_allowance = 0.0
+        self.token_allowance = 0.0
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self.concurrency = None
+        self.in_flight = 0
+        self.latency = None
+        self.last_decrease = 0.0
+    
+    def configure(self, config: Dict[str, Any]):
+        """LLM設定から上限値を反映（初回はバケットを満杯にして開始）"""
+        with self.condition:
+            self._refill(time.monotonic())
+            rpm = max(0.0, float(config.get("requests_per_minute", 0)))
+            tpm = max(0.0, float(config.get("tokens_per_minute", 0)))
+            if self.concurrency is None:
+                self.request_allowance = rpm
+                self.token_allowance = tpm
+            self.requests_per_minute = rpm
+            self.tokens_per_minute = tpm
+            self.max_concurrency = max(1, int(config.get("max_concurrency", 8)))
+            self.latency_spike_factor = max(1.0, float(config.get("latency_spike_factor", 3.0)))
+            if self.concurrency is None:
+                self.concurrency = float(max(1, int(config.get("initial_concurrency", 2))))
+            self.concurrency = min(self.concurrency, float(self.max_concurrency))
+            self.condition.notify_all()
+    
+    def _refill(self, now: float):
+        """経過時間に応じてバケットを補充（上限は1分あたりの量）"""
+        elapsed = max(0.0, now - self.updated)
+        self.updated = now
+        if self.requests_per_minute:
+            self.request_allowance = min(self.requests_per_minute,
+                                         self.request_allowance + elapsed * self.requests_per_minute / 60)
+        if self.tokens_per_minute:
+            self.token_allowance = min(self.tokens_per_minute,
+                                       self.token_allowance + elapsed * self.tokens_per_minute / 60)
+    
+    def acquire(self, tokens: int, cancel_token: CancellationToken) -> bool:
+        """送信枠を確保するまで待機
+        
+        Args:
+            tokens: リクエストの見積もりトークン数（入力と最大出力の合計）
+            cancel_token: キャンセルトークン
+            
+        Returns:
+            確保できた場合True、待機中にキャンセルされた場合False
+        """
+        waited = False
+        with self.condition:
+            # 1分あたりの上限を超えるリクエストでも永久に待たないよう上限で切り詰める
+            if self.tokens_per_minute:
+                tokens = min(tokens, self.tokens_per_minute)
+            while True:
+                if cancel_token.is_cancelled():
+                    return False
+                now = time.monotonic()
+                self._refill(now)
+                wait = self.paused_until - now
+                if wait <= 0:
+                    if self.in_flight >= int(self.concurrency):
+                        # 実行中の呼び出しが終わるとnotifyされる
+                        wait = 0.5
+                    elif self.requests_per_minute and self.request_allowance < 1:
+                        wait = (1 - self.request_allowance) * 60 / self.requests_per_minute
+                    elif self.tokens_per_minute and self.token_allowance < tokens:
+                        wait = (tokens - self.token_allowance) * 60 / self.tokens_per_minute
+                    else:
+                        if self.requests_per_minute:
+                            self.request_allowance -= 1
+                        if self.tokens_per_minute:
+                            self.token_allowance -= tokens
+                        self.in_flight += 1
+                        if waited:
+                            logger.debug(f"LLM API ({self.label}) 送信枠を確保しました "
+                                         f"(実行中 {self.in_flight}/{int(self.concurrency)})")
+                        return True
+                waited = True
+                self.condition.wait(min(wait, 0.5))
+    
+    def release(self, latency: Optional[float] = None, rate_limited: bool = False,
+                retry_after: Optional[float] = None):
+        """呼び出し完了を通知し、結果に応じて同時実行数を調整
+        
+        Args:
+            latency: 応答の遅延（ストリーミングでは最初のトークンまで、それ以外は応答全体の秒数）。
+                失敗・中断時はNone
+            rate_limited: 429などレート制限の応答だった場合True
+            retry_after: サーバーから指定された待機秒数
+        """
+        with self.condition:
+            self.in_flight = max(0, self.in_flight - 1)
+            now = time.monotonic()
+            if rate_limited:
+                # 全ワーカーが同時にリトライしないよう、指定時間はバケット全体を止める
+                if retry_after:
+                    self.paused_until = max(self.paused_until, now + retry_after)
+                self._decrease(now, "レート制限")
+            elif latency is not None:
+                # 短い応答のわずかな揺らぎを急増とみなさないよう、1秒以上の増加だけを対象にする
+                if self.latency is not None and latency > max(self.latency * self.latency_spike_factor,
+                                                              self.latency + 1.0):
+                    self._decrease(now, f"遅延の急増 {latency:.1f}秒 (平均 {self.latency:.1f}秒)")
+                else:
+                    # 加算的増加: 同時実行数ぶん成功するごとに1増える
+                    previous = int(self.concurrency)
+                    self.concurrency = min(float(self.max_concurrency), self.concurrency + 1 / self.concurrency)
+                    if int(self.concurrency) > previous:
+                        logger.info(f"LLM API ({self.label}) 同時実行数を {int(self.concurrency)} に増やしました")
+                self.latency = latency if self.latency is None else self.latency * 0.8 + latency * 0.2
+            self.condition.notify_all()
+    
+    def _decrease(self, now: float, reason: str):
+        """同時実行数を半分に減らす（同じ混雑で何度も減らさないよう平均遅延の間は1回だけ）"""
+        if now - self.last_decrease < max(1.0, self.latency or 0.0):
+            return
+        self.last_decrease = now
+        previous = int(self.concurrency)
+        self.concurrency = max(1.0, self.concurrency / 2)
+        logger.warning(f"⚠️ LLM API ({self.label}) {reason}のため同時実行数を "
+                       f"{previous} から {int(self.concurrency)} に減らしました")
+
+
+def get_llm_rate_limiter(provider: str, config: Dict[str, Any]) -> LlmRateLimiter:
+    """プロバイダー・モデルごとの共有レート制限を取得（設定の変更も反映）"""
+    key = (provider, config.get("model", ""))
+    with llm_sessions_lock:
+        limiter = llm_rate_limiters.get(key)
+        if limiter is None:
+            limiter = LlmRateLimiter(f"{provider}/{key[1]}" if key[1] else provider)
+            llm_rate_limiters[key] = limiter
+    limiter.configure(config)
+    return limiter
+
+
+def estimate_request_tokens(prompt: str, config: Dict[str, Any], max_tokens: int,
+                            system_prompt: str = "") -> int:
+    """レート制限に計上するトークン数を見積もる（入力と最大出力の合計）"""
+    tokenizer = get_model_capabilities(config)["tokenizer"]
+    return estimate_tokens(system_prompt + prompt, tokenizer) + max_tokens
+
+
+def get_llm_session(provider: str) -> requests.Session:
+    """プロバイダーごとのHTTPセッションを取得（keep-aliveで接続を再利用）"""
+    with llm_sessions_lock:
+        session = llm_sessions.get(provider)
+        if session is None:
+            session = requests.Session()
+            # 並列チャンク処理でも接続を使い回せるようプールサイズを確保
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=16)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            llm_sessions[provider] = session
+        return session
+
+
+def close_llm_sessions():
+    """すべてのLLMプロバイダーのHTTPセッションを閉じる"""
+    with llm_sessions_lock:
+        for session in llm_sessions.values():
+            try:
+                session.close()
+            except Exception:
+                pass
+        llm_sessions.clear()
+
+
+def get_llm_attempt_stats() -> Dict[str, Dict[str, Any]]:
+    """直近のLLM API試行の計測結果をプロバイダー・モデルごとに集計
+    
+    Returns:
+        "provider/model"をキーとし、試行数・成功数・リトライ数・失敗内訳と
+        応答時間（平均・p95・最大）を持つ辞書
+    """
+    stats = {}
+    # 他スレッドの追加と競合しないよう先に複製してから集計
+    for entry in list(llm_attempt_history):
+        key = f"{entry['provider']}/{entry['model']}" if entry["model"] else entry["provider"]
+        item = stats.setdefault(key, {"attempts": 0, "succeeded": 0, "retries": 0, "failures": {}, "elapsed": []})
+        item["attempts"] += 1
+        if entry["attempt"] > 1:
+            item["retries"] += 1
+        status = entry["status"]
+        if status is not None and status < 400:
+            item["succeeded"] += 1
+        else:
+            reason = str(status) if status is not None else "通信エラー"
+            item["failures"][reason] = item["failures"].get(reason, 0) + 1
+        item["elapsed"].append(entry["elapsed"])
+    
+    for item in stats.values():
+        elapsed = sorted(item.pop("elapsed"))
+        item["avg_elapsed"] = sum(elapsed) / len(elapsed)
+        item["p95_elapsed"] = elapsed[min(len(elapsed) - 1, int(len(elapsed) * 0.95))]
+        item["max_elapsed"] = elapsed[-1]
+    return stats
+
+
+def log_llm_attempt_stats():
+    """直近のLLM API試行の集計結果をログに出力"""
+    for key, item in get_llm_attempt_stats().items():
+        failures = "、".join(f"{reason}×{count}" for reason, count in item["failures"].items()) or "なし"
+        logger.info(f"📊 LLM API ({key}) 試行 {item['attempts']}回（成功 {item['succeeded']}、"
+                    f"リトライ {item['retries']}、失敗 {failures}） 応答時間 平均 {item['avg_elapsed']:.2f}秒 / "
+                    f"p95 {item['p95_elapsed']:.2f}秒 / 最大 {item['max_elapsed']:.2f}秒")
+
+
+def get_retry_after(response: requests.Response) -> Optional[float]:
+    """Retry-Afterヘッダーから待機秒数を取得（秒数またはHTTP日付形式）"""
+    value = response.headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+        return max(0.0, retry_at.timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def get_retry_delay(attempt: int, config: Dict[str, Any], retry_after: Optional[float] = None) -> float:
+    """リトライまでの待機秒数を計算（ジッター付き指数バックオフ）
+    
+    Args:
+        attempt: 失敗した試行回数（1から開始）
+        config: LLM設定
+        retry_after: サーバーから指定された待機秒数
+        
+    Returns:
+        待機秒数
+    """
+    base = float(config.get("retry_backoff_base", 1.0))
+    max_delay = float(config.get("retry_backoff_max", 30.0))
+    # フルジッター: 0〜上限の範囲でランダムに待機し、リトライの集中を避ける
+    delay = random.uniform(0, min(max_delay, base * (2 ** (attempt - 1))))
+    if retry_after is not None:
+        # サーバーの指定より早くは再試行しない
+        delay = max(delay, min(retry_after, max_delay * 4))
+    return delay
+
+
+def run_cancellable(func, cancel_token: CancellationToken, *args, **kwargs):
+    """関数を別スレッドで実行し、キャンセルされたら完了を待たずに戻る
+    
+    ブロッキングするHTTP通信を中断できないため、呼び出し元だけを先に解放する。
+    取り残されたスレッドは通信タイムアウトで必ず終了する。
+    
+    Raises:
+        JobCancelledError: 完了前にキャンセルされた場合
+    """
+    result = {}
+    done = threading.Event()
+    
+    def worker():
+        try:
+            result["value"] = func(*args, **kwargs)
+        except BaseException as e:
+            result["error"] = e
+        finally:
+            done.set()
+    
+    threading.Thread(target=worker, daemon=True).start()
+    while not done.wait(0.5):
+        cancel_token.check()
+    
+    if "error" in result:
+        raise result["error"]
+    return result["value"]
+
+
+def get_request_timeout(config: Dict[str, Any], cancel_token: CancellationToken) -> Tuple[float, float]:
+    """接続・読み込みタイムアウトを取得（ジョブの残り時間を上限とする）"""
+    connect_timeout = float(config.get("connect_timeout", 10))
+    read_timeout = float(config.get("read_timeout", 300))
+    remaining = cancel_token.remaining()
+    if remaining is not None:
+        connect_timeout = max(1.0, min(connect_timeout, remaining))
+        read_timeout = max(1.0, min(read_timeout, remaining))
+    return connect_timeout, read_timeout
+
+
+def post_llm_request(provider: str, url: str, headers: Dict[str, str], data: Dict[str, Any],
+                     config: Dict[str, Any],
+                     cancel_token: Optional[CancellationToken] = None,
+                     stream: bool = False,
+                     estimated_tokens: int = 0) -> Optional[requests.Response]:
+    """LLM APIへPOSTリクエストを送信（一時的なエラーはリトライ）
+    
+    送信前にプロバイダー・モデルごとの共有レート制限で送信枠を確保する。リトライする試行の
+    送信枠はここで解放し、返したレスポンスの送信枠は呼び出し元が本文を読み終えてから
+    release_llm_requestで解放する（ストリーミングの生成中も同時実行数に数えるため）。
+    
+    Args:
+        provider: プロバイダー名（openai, anthropic, google）
+        url: リクエスト先URL
+        headers: HTTPヘッダー
+        data: リクエストボディ（JSON）
+        config: LLM設定（max_retries, retry_backoff_*, connect_timeout, read_timeoutを参照）
+        cancel_token: キャンセルトークン（省略時はサービス全体のトークン）
+        stream: レスポンス本文を読まずに返す（ストリーミング応答を逐次読む場合）
+        estimated_tokens: レート制限に計上する見積もりトークン数
+        
+    Returns:
+        最後に受信したレスポンス（送信枠を確保したまま）、または通信に失敗・中断した場合はNone
+    """
+    cancel_token = cancel_token or service_cancel_token
+    session = get_llm_session(provider)
+    limiter = get_llm_rate_limiter(provider, config)
+    max_retries = max(0, int(config.get("max_retries", 3)))
+    response = None
+    error = None
+    
+    for attempt in range(1, max_retries + 2):
+        if cancel_token.is_cancelled():
+            logger.warning(f"⚠️ LLM API ({provider}) 呼び出しを中断しました: {cancel_token.reason}")
+            return None
+        
+        if not limiter.acquire(estimated_tokens, cancel_token):
+            logger.warning(f"⚠️ LLM API ({provider}) 呼び出しを中断しました: {cancel_token.reason}")
+            return None
+        
+        started = time.perf_counter()
+        error = None
+        try:
+            timeout = get_request_timeout(config, cancel_token)
+            response = run_cancellable(session.post, cancel_token, url, headers=headers, json=data,
+                                       timeout=timeout, stream=stream)
+            status = response.status_code
+        except JobCancelledError as e:
+            limiter.release()
+            logger.warning(f"⚠️ LLM API ({provider}) 呼び出しを中断しました: {e}")
+            return None
+        except (requests.ConnectionError, requests.Timeout) as e:
+            response = None
+            status = None
+            error = e
+        except Exception:
+            limiter.release()
+            raise
+        elapsed = time.perf_counter() - started
+        
+        # 試行ごとの計測結果を記録
+        llm_attempt_history.append({
+            "provider": provider,
+            "model": config.get("model", ""),
+            "attempt": attempt,
+            "status": status,
+            "elapsed": elapsed,
+            "error": str(error) if error else None,
+            "timestamp": datetime.now().isoformat()
+        })
+        logger.info(f"LLM API ({provider}) 試行 {attempt}: ステータス {status or '通信エラー'}、{elapsed:.2f}秒")
+        
+        retryable = error is not None or status in RETRYABLE_STATUS_CODES
+        if not retryable or attempt > max_retries:
+            if response is None:
+                limiter.release()
+            break
+        
+        # リトライする試行の送信枠を解放（レート制限の応答なら同時実行数を減らす）
+        retry_after = get_retry_after(response) if response is not None else None
+        limiter.release(rate_limited=status in RATE_LIMIT_STATUS_CODES, retry_after=retry_after)
+        if response is not None:
+            # 読まなかった本文を破棄して接続をプールに戻す
+            response.close()
+        delay = get_retry_delay(attempt, config, retry_after)
+        logger.warning(f"⚠️ LLM API ({provider}) 一時的なエラーのため {delay:.1f}秒後にリトライします "
+                       f"({attempt}/{max_retries}): {error or status}")
+        if cancel_token.wait(delay):
+            logger.warning(f"⚠️ LLM API ({provider}) 呼び出しを中断しました: {cancel_token.reason}")
+            return None
+    
+    if response is None:
+        logger.error(f"❌ LLM API ({provider}) への接続に失敗しました: {error}")
+    return response
+
+
+def release_llm_request(provider: str, config: Dict[str, Any], response: requests.Response,
+                        sent: float, timings: Dict[str, float]):
+    """post_llm_requestが返したレスポンスの送信枠を解放（本文を読み終えてから呼ぶ）
+    
+    応答の遅延として、ストリーミングでは最初のトークンまで、それ以外は応答全体の秒数を
+    同時実行数の制御に渡す。受信に失敗した場合は遅延を渡さない。
+    
+    Args:
+        provider: プロバイダー名（openai, anthropic, google）
+        config: LLM設定
+        response: post_llm_requestが返したレスポンス
+        sent: 最後の試行でリクエストを送信した時刻（time.perf_counter()）
+        timings: 受信の計測結果（first_token・completedの時刻）
+    """
+    status = response.status_code
+    rate_limited = status in RATE_LIMIT_STATUS_CODES
+    latency = None
+    if status < 400 and "completed" in timings:
+        latency = timings.get("first_token", timings["completed"]) - sent
+    get_llm_rate_limiter(provider, config).release(latency, rate_limited,
+                                                   get_retry_after(response) if rate_limited else None)
+
+
+def extract_stream_text(provider: str, event: Dict[str, Any]) -> str:
+    """ストリーミング応答の1イベントから生成されたテキストを取り出す
+    
+    Raises:
+        RuntimeError: エラーイベントを受信した場合
+    """
+    if "error" in event:
+        raise RuntimeError(event["error"])
+    if provider == "openai":
+        choices = event.get("choices") or [{}]
+        return choices[0].get("delta", {}).get("content") or ""
+    if provider == "anthropic":
+        if event.get("type") == "content_block_delta" and event["delta"].get("type") == "text_delta":
+            return event["delta"]["text"]
+        return ""
+    # Gemini: 各イベントがGenerateContentResponse
+    candidates = event.get("candidates") or [{}]
+    return "".join(part.get("text", "") for part in candidates[0].get("content", {}).get("parts", []))
+
+
+def read_llm_stream(provider: str, response: requests.Response, sent: float,
+                    cancel_token: Optional[CancellationToken] = None,
+                    on_text: Optional[Callable[[str], None]] = None,
+                    timings: Optional[Dict[str, float]] = None) -> Optional[str]:
+    """ストリーミング応答（Server-Sent Events）を読み、生成されたテキストを逐次渡す
+    
+    読み込みタイムアウトはイベント間の待ち時間に対して適用されるため、長い生成でも
+    全体が1回のタイムアウトに収まる必要はない。
+    
+    Args:
+        provider: プロバイダー名（openai, anthropic, google）
+        response: stream=Trueで受信したレスポンス
+        sent: 最後の試行を送信した時刻（time.perf_counter()）。待機や再試行の時間は含めない
+        cancel_token: キャンセルトークン
+        on_text: 生成されたテキストの断片を受け取る関数
+        timings: 最初のトークン（first_token）と受信完了（completed）の時刻を記録する辞書
+        
+    Returns:
+        生成されたテキスト全体、または中断・エラー時はNone
+    """
+    cancel_token = cancel_token or service_cancel_token
+    timings = timings if timings is not None else {}
+    finished = threading.Event()
+    
+    def close_on_cancel():
+        # イベント待ちで止まっていても接続を閉じて中断する
+        while not finished.is_set():
+            if cancel_token.wait(0.5):
+                response.close()
+                return
+    
+    threading.Thread(target=close_on_cancel, daemon=True).start()
+    response.encoding = "utf-8"
+    parts = []
+    try:
+        for line in response.iter_lines(chunk_size=None, decode_unicode=True):
+            if not line or not line.startswith("data:"):
+                continue
+            payload = line[5:].strip()
+            if payload == "[DONE]":
+                break
+            text = extract_stream_text(provider, json.loads(payload))
+            if not text:
+                continue
+            if not parts:
+                timings["first_token"] = time.perf_counter()
+                logger.info(f"⚡ LLM API ({provider}) 最初のトークンまで {timings['first_token'] - sent:.2f}秒")
+            parts.append(text)
+            if on_text is not None:
+                on_text(text)
+    except (requests.RequestException, ValueError, RuntimeError, AttributeError) as e:
+        if cancel_token.is_cancelled():
+            logger.warning(f"⚠️ LLM API ({provider}) の受信を中断しました: {cancel_token.reason}")
+        else:
+            logger.error(f"❌ LLM API ({provider}) のストリーミング受信エラー: {e}")
         return None
+    finally:
+        finished.set()
+        response.close()
+    
+    timings["completed"] = time.perf_counter()
+    logger.info(f"LLM API ({provider}) ストリーミング受信完了: {len(parts)}イベント、"
+                f"合計 {time.perf_counter() - sent:.2f}秒")
+    return "".join(parts)
 
 
-def call_openai_api(prompt: str, config: Dict[str, Any]) -> Optional[str]:
+def call_openai_api(prompt: str, config: Dict[str, Any],
+                    cancel_token: Optional[CancellationToken] = None,
+                    on_text: Optional[Callable[[str], None]] = None) -> Optional[str]:
     """OpenAI APIを呼び出す"""
     api_key = config["api_key"]
     if not api_key:
@@ -876,35 +3492,52 @@ def call_openai_api(prompt: str, config: Dict[str, Any]) -> Optional[str]:
             "Authorization": f"Bearer {api_key}"
         }
         
+        max_tokens = get_max_output_tokens(prompt, config, SYSTEM_PROMPT)
         data = {
             "model": config["model"],
             "messages": [
-                {"role": "system", "content": "あなたは会議の音声文字起こしから議事録を作成する専門家です。"},
+                {"role": "system", "content": SYSTEM_PROMPT},
                 {"role": "user", "content": prompt}
             ],
             "temperature": config["temperature"],
-            "max_tokens": config["max_tokens"]
+            "max_tokens": max_tokens
         }
+        stream = config.get("stream", True)
+        if stream:
+            data["stream"] = True
         
-        response = requests.post(
-            "https://api.openai.com/v1/chat/completions",
-            headers=headers,
-            json=data
-        )
-        
-        if response.status_code == 200:
-            result = response.json()
-            return result["choices"][0]["message"]["content"]
-        else:
-            logger.error(f"❌ API呼び出しエラー: {response.status_code} - {response.text}")
+        tokens = estimate_request_tokens(prompt, config, max_tokens, SYSTEM_PROMPT)
+        response = post_llm_request("openai", LLM_API_URLS["openai"], headers, data, config, cancel_token, stream,
+                                    tokens)
+        if response is None:
             return None
+        
+        # 最後の試行の送信時刻（ヘッダー受信までの時間から逆算）
+        sent = time.perf_counter() - response.elapsed.total_seconds()
+        timings = {}
+        try:
+            if response.status_code == 200:
+                if stream:
+                    return read_llm_stream("openai", response, sent, cancel_token, on_text, timings)
+                timings["completed"] = time.perf_counter()
+                result = response.json()["choices"][0]["message"]["content"]
+                if on_text is not None:
+                    on_text(result)
+                return result
+            else:
+                logger.error(f"❌ API呼び出しエラー: {response.status_code} - {response.text}")
+                return None
+        finally:
+            release_llm_request("openai", config, response, sent, timings)
     
     except Exception as e:
         logger.error(f"❌ OpenAI API呼び出し例外: {e}")
         return None
 
 
-def call_anthropic_api(prompt: str, config: Dict[str, Any]) -> Optional[str]:
+def call_anthropic_api(prompt: str, config: Dict[str, Any],
+                       cancel_token: Optional[CancellationToken] = None,
+                       on_text: Optional[Callable[[str], None]] = None) -> Optional[str]:
     """Anthropic Claude APIを呼び出す"""
     api_key = config["api_key"]
     if not api_key:
@@ -919,34 +3552,51 @@ def call_anthropic_api(prompt: str, config: Dict[str, Any]) -> Optional[str]:
             "anthropic-version": "2023-06-01"  # APIバージョン
         }
         
+        max_tokens = get_max_output_tokens(prompt, config)
         data = {
             "model": config["model"],
             "messages": [
                 {"role": "user", "content": prompt}
             ],
             "temperature": config["temperature"],
-            "max_tokens": config["max_tokens"]
+            "max_tokens": max_tokens
         }
+        stream = config.get("stream", True)
+        if stream:
+            data["stream"] = True
         
-        response = requests.post(
-            "https://api.anthropic.com/v1/messages",
-            headers=headers,
-            json=data
-        )
-        
-        if response.status_code == 200:
-            result = response.json()
-            return result["content"][0]["text"]
-        else:
-            logger.error(f"❌ API呼び出しエラー: {response.status_code} - {response.text}")
+        tokens = estimate_request_tokens(prompt, config, max_tokens)
+        response = post_llm_request("anthropic", LLM_API_URLS["anthropic"], headers, data, config, cancel_token,
+                                    stream, tokens)
+        if response is None:
             return None
+        
+        # 最後の試行の送信時刻（ヘッダー受信までの時間から逆算）
+        sent = time.perf_counter() - response.elapsed.total_seconds()
+        timings = {}
+        try:
+            if response.status_code == 200:
+                if stream:
+                    return read_llm_stream("anthropic", response, sent, cancel_token, on_text, timings)
+                timings["completed"] = time.perf_counter()
+                result = response.json()["content"][0]["text"]
+                if on_text is not None:
+                    on_text(result)
+                return result
+            else:
+                logger.error(f"❌ API呼び出しエラー: {response.status_code} - {response.text}")
+                return None
+        finally:
+            release_llm_request("anthropic", config, response, sent, timings)
     
     except Exception as e:
         logger.error(f"❌ Anthropic API呼び出し例外: {e}")
         return None
 
 
-def call_google_api(prompt: str, config: Dict[str, Any]) -> Optional[str]:
+def call_google_api(prompt: str, config: Dict[str, Any],
+                    cancel_token: Optional[CancellationToken] = None,
+                    on_text: Optional[Callable[[str], None]] = None) -> Optional[str]:
     """Google Gemini APIを呼び出す"""
     api_key = config.get("google_api_key", "")
     if not api_key:
@@ -958,12 +3608,16 @@ def call_google_api(prompt: str, config: Dict[str, Any]) -> Optional[str]:
         model = config["model"]
         # モデル名に基づいてAPIパスを構築
         # API仕様に合わせてモデル名をそのまま使用
-        url = f"https://generativelanguage.googleapis.com/v1beta/models/{model}:generateContent?key={api_key}"
+        stream = config.get("stream", True)
+        url = LLM_API_URLS["google_stream" if stream else "google"].format(model=model)
         
+        # APIキーはURLではなくヘッダーで渡す（ログやリトライ時のURLに残さないため）
         headers = {
-            "Content-Type": "application/json"
+            "Content-Type": "application/json",
+            "x-goog-api-key": api_key
         }
         
+        max_tokens = get_max_output_tokens(prompt, config)
         data = {
             "contents": [
                 {
@@ -973,39 +3627,53 @@ def call_google_api(prompt: str, config: Dict[str, Any]) -> Optional[str]:
             ],
             "generationConfig": {
                 "temperature": config["temperature"],
-                "maxOutputTokens": config["max_tokens"],
+                "maxOutputTokens": max_tokens,
                 "topP": 0.95,
                 "topK": 40
             }
         }
         
-        response = requests.post(url, headers=headers, json=data)
-        
-        if response.status_code == 200:
-            result = response.json()
-            # レスポンス形式に合わせて適切にパースする
-            if "candidates" in result and len(result["candidates"]) > 0:
-                if "content" in result["candidates"][0]:
-                    if "parts" in result["candidates"][0]["content"]:
-                        text_parts = []
-                        for part in result["candidates"][0]["content"]["parts"]:
-                            if "text" in part:
-                                text_parts.append(part["text"])
-                        return "".join(text_parts)
-            
-            logger.error(f"Google API応答の解析に失敗しました: {result}")
-            return None
-        else:
-            logger.error(f"❌ Google API呼び出しエラー: {response.status_code} - {response.text}")
+        tokens = estimate_request_tokens(prompt, config, max_tokens)
+        response = post_llm_request("google", url, headers, data, config, cancel_token, stream, tokens)
+        if response is None:
             return None
+        
+        # 最後の試行の送信時刻（ヘッダー受信までの時間から逆算）
+        sent = time.perf_counter() - response.elapsed.total_seconds()
+        timings = {}
+        try:
+            if response.status_code == 200:
+                if stream:
+                    return read_llm_stream("google", response, sent, cancel_token, on_text, timings)
+                timings["completed"] = time.perf_counter()
+                result = response.json()
+                # レスポンス形式に合わせて適切にパースする
+                if "candidates" in result and len(result["candidates"]) > 0:
+                    if "content" in result["candidates"][0]:
+                        if "parts" in result["candidates"][0]["content"]:
+                            text_parts = []
+                            for part in result["candidates"][0]["content"]["parts"]:
+                                if "text" in part:
+                                    text_parts.append(part["text"])
+                            if on_text is not None:
+                                on_text("".join(text_parts))
+                            return "".join(text_parts)
+                
+                logger.error(f"Google API応答の解析に失敗しました: {result}")
+                return None
+            else:
+                logger.error(f"❌ Google API呼び出しエラー: {response.status_code} - {response.text}")
+                return None
+        finally:
+            release_llm_request("google", config, response, sent, timings)
     
     except Exception as e:
         logger.error(f"❌ Google API呼び出し例外: {e}")
         return None
 
 
-def save_output(content: str, original_file: str, config: Dict[str, Any]) -> str:
-    """生成された議事録を保存"""
+def get_output_path(original_file: str, config: Dict[str, Any]) -> str:
+    """議事録の出力ファイルのパスを決定（出力ディレクトリがなければ作成）"""
     output_dir = config["file_watcher"]["output_directory"]
     if not output_dir:
         output_dir = os.path.dirname(original_file)
@@ -1016,94 +3684,200 @@ def save_output(content: str, original_file: str, config: Dict[str, Any]) -> str
     # 出力ファイル名を生成
     base_name = os.path.splitext(os.path.basename(original_file))[0]
     timestamp = datetime.now().strftime("%Y-%m%d-%H%M")
-    output_file = os.path.join(output_dir, f"{base_name}_memo_{timestamp}.txt")
+    return os.path.join(output_dir, f"{base_name}_memo_{timestamp}.txt")
+
+
+def save_output(content: str, original_file: str, config: Dict[str, Any],
+                output_file: Optional[str] = None) -> str:
+    """生成された議事録を保存
+    
+    一時ファイル（生成中の.partialファイル）に全文を書いてから置き換えるため、
+    出力ファイルは常に完成した内容だけになる。
+    """
+    output_file = output_file or get_output_path(original_file, config)
     
     # 内容を保存
-    with open(output_file, "w", encoding="utf-8") as f:
+    partial_file = f"{output_file}.partial"
+    with open(partial_file, "w", encoding="utf-8") as f:
         f.write(content)
+    os.replace(partial_file, output_file)
     
     logger.info(f"議事録を保存しました: {output_file}")
     return output_file
 
 
-def process_file_queue():
-    """ファイルキューを処理"""
-    global should_stop, config
+def process_job(job: Dict[str, Any]):
+    """ジョブを処理（文字起こし済みの場合は議事録生成から再開）"""
+    job_id = job["id"]
+    file_path = job["file_path"]
+    base_filename = os.path.basename(file_path)
+    # 処理中に設定が再読み込みされても、1つのジョブでは同じ設定を使う
+    job_config = config
     
-    logger.info("ファイル処理スレッドを開始しました。")
-    config = load_config()
+    # 処理済みかどうかの再チェック（キューに入った後に他のプロセスで処理された可能性）
+    if is_file_processed(file_path):
+        logger.info(f"ファイルは既に処理済みです（キュー内再チェック）: {file_path}")
+        update_job(job_id, JOB_DONE)
+        return
+    
+    # クラッシュを繰り返すジョブは失敗として扱う（正常な停止による再開は数えない）
+    if job["attempts"] >= MAX_JOB_ATTEMPTS:
+        logger.error(f"❌ 処理の中断回数が上限（{MAX_JOB_ATTEMPTS}回）に達したため失敗として扱います: {file_path}")
+        update_job(job_id, JOB_FAILED, error="処理の中断回数が上限に達しました")
+        return
+    
+    # 文字起こしの期限は音声の長さに比例させる（長さ不明・録音中のファイルは期限なし）
+    processing_config = job_config.get("processing", {})
+    # 録音中のファイルは書き込みの完了を待たずにライブモードで文字起こしする
+    live = is_live_recording(file_path, job_config)
+    if live:
+        logger.info(f"🎙️ 録音中のファイルとしてライブ文字起こしします: {file_path}")
+    timeout_factor = float(processing_config.get("transcription_timeout_factor", 2.0))
+    duration = job.get("duration")
+    if duration is None and not live:
+        # 登録後の長さの調査がまだ終わっていなければここで調べる
+        duration = get_media_duration(file_path)
+        if duration is not None:
+            update_job(job_id, job["stage"], duration=duration)
+            job["duration"] = duration
+    transcription_timeout = None
+    if timeout_factor > 0 and duration and not live:
+        # モデルの読み込みなど長さに依存しない準備時間として10分を加える
+        transcription_timeout = duration * timeout_factor + 600
+    # ジョブ全体の期限（job_timeoutに文字起こしの期限を加え、長い録音でも議事録生成の時間を残す）。
+    # 録音中のファイルは録音の長さが分からないため、ジョブ全体の期限は設けない
+    job_timeout = float(processing_config.get("job_timeout", 14400))
+    if job_timeout > 0 and transcription_timeout:
+        job_timeout += transcription_timeout
+    # ジョブ単位の期限付きキャンセルトークン（サービス停止でもキャンセルされる）
+    job_token = CancellationToken(parent=service_cancel_token, timeout=None if live else job_timeout or None)
+    
+    # ファイル処理
+    logger.info(f"🔄 ===== 処理開始: {base_filename} =====")
+    
+    transcription = None
+    if job["stage"] == JOB_SUMMARIZING:
+        # 前回保存した文字起こし結果から再開
+        transcript_file = job.get("transcript_file")
+        try:
+            with open(transcript_file, "r", encoding="utf-8") as f:
+                transcription = Transcript.parse(f.read())
+            logger.info(f"⏩ 保存済みの文字起こし結果から再開します: {transcript_file}")
+        except (OSError, TypeError) as e:
+            logger.warning(f"⚠️ 保存済みの文字起こし結果を読み込めないため、文字起こしからやり直します: {e}")
+            update_job(job_id, JOB_TRANSCRIBING)
+    
+    if transcription is None:
+        logger.info(f"📋 処理ステップ [1/4]: 文字起こし準備")
+        
+        # 1. 文字起こし
+        logger.info(f"🔄 処理ステップ [2/4]: 文字起こし実行中...")
+        model_size, compute_type = select_model_for_job(job, job_config)
+        update_job(job_id, JOB_TRANSCRIBING, model=f"{model_size}/{compute_type}")
+        
+        base_name = os.path.splitext(os.path.basename(file_path))[0]
+        timestamp = datetime.now().strftime("%Y-%m%d-%H%M")
+        
+        # 文字起こしディレクトリに保存
+        transcript_dir = job_config["file_watcher"]["transcript_directory"]
+        # ディレクトリの存在チェックは validate_config で行われているので、ここでは省略
+        
+        transcript_file = os.path.join(transcript_dir, f"{base_name}_transcript_{timestamp}.txt")
+        # 文字起こしの段階の期限（ジョブ全体の期限の範囲内でさらに制限する）
+        stage_token = CancellationToken(parent=job_token, timeout=transcription_timeout)
+        if live:
+            # 録音中のファイルは追記を待ちながら文字起こし
+            transcription = transcribe_live(file_path, job_config, transcript_file, stage_token, model_size, compute_type)
+        else:
+            transcription = transcribe_file(file_path, job_config, stage_token, model_size, compute_type)
+        if should_stop or stage_token.is_cancelled():
+            logger.warning(f"❌ 文字起こしが中断されました: {file_path}")
+            # サービス停止による中断は次回起動時に再開する
+            update_job(job_id, JOB_QUEUED if should_stop else JOB_FAILED, error=stage_token.reason)
+            return
+        if not transcription:
+            logger.warning(f"❌ 文字起こしに失敗しました: {file_path}")
+            update_job(job_id, JOB_FAILED, error="文字起こしに失敗しました")
+            return
+        
+        # 文字起こし結果を保存
+        with open(transcript_file, "w", encoding="utf-8") as f:
+            f.write(transcription.format())
+        logger.info(f"✅ 文字起こし結果を保存しました: {transcript_file}")
+        
+        update_job(job_id, JOB_TRANSCRIBED, transcript_file=transcript_file)
+        update_job(job_id, JOB_SUMMARIZING)
+    
+    # 2. LLM API呼び出し
+    logger.info(f"🔄 処理ステップ [3/4]: LLM APIで議事録生成中...")
+    # 議事録生成の段階の期限（ジョブ全体の期限の範囲内でさらに制限する）
+    summary_timeout = float(processing_config.get("summary_timeout", 0))
+    stage_token = CancellationToken(parent=job_token, timeout=summary_timeout or None)
+    # 生成中の議事録を.partialファイルに逐次書き込み、完成したら出力ファイルに置き換える
+    output_file = get_output_path(file_path, job_config)
+    partial_file = f"{output_file}.partial"
+    with open(partial_file, "w", encoding="utf-8") as partial:
+        def write_partial(text: str):
+            partial.write(text)
+            partial.flush()
+        
+        memo = call_llm_api(transcription, job_config, stage_token, write_partial)
+    if not memo or should_stop or stage_token.is_cancelled():
+        os.remove(partial_file)
+    
+    if should_stop or stage_token.is_cancelled():
+        logger.warning(f"❌ 議事録生成が中断されました: {file_path}")
+        # 文字起こし結果は保存済みなので、再開時は議事録生成から行う
+        update_job(job_id, JOB_TRANSCRIBED if should_stop else JOB_FAILED, error=stage_token.reason)
+        return
+    if not memo:
+        logger.warning(f"❌ 議事録生成に失敗しました: {file_path}")
+        update_job(job_id, JOB_FAILED, error="議事録生成に失敗しました")
+        return
+    
+    # 3. 結果を保存
+    logger.info(f"🔄 処理ステップ [4/4]: 議事録保存中...")
+    output_file = save_output(memo, file_path, job_config, output_file)
+    
+    logger.info(f"✅✅ 処理完了: {base_filename}")
+    logger.info(f"📄 出力ファイル: {output_file}")
+    logger.info(f"===== 処理終了: {base_filename} =====")
+    
+    # 4. 処理済みとしてマーク
+    mark_file_as_processed(file_path, output_file)
+    update_job(job_id, JOB_DONE, output_file=output_file, error=None)
+
+
+def process_file_queue(worker_id: int = 1):
+    """ジョブキューを処理（複数のワーカースレッドから並行して呼ばれる）"""
+    logger.info(f"ファイル処理スレッド（ワーカー {worker_id}）を開始しました。")
     
     while not should_stop:
+        job = None
         try:
-            # キューからファイルを取得（タイムアウト付き）
-            try:
-                file_path = file_queue.get(timeout=1)
-            except queue.Empty:
-                continue
-            
-            # 処理済みかどうかの再チェック（キューに入った後に他のプロセスで処理された可能性）
-            if is_file_processed(file_path):
-                logger.info(f"ファイルは既に処理済みです（キュー内再チェック）: {file_path}")
-                file_queue.task_done()
-                continue
+            # GUIなどで設定が変更されていれば反映
+            reload_config_if_changed()
             
-            # ファイル処理
-            base_filename = os.path.basename(file_path)
-            logger.info(f"🔄 ===== 処理開始: {base_filename} =====")
-            logger.info(f"📋 処理ステップ [1/4]: 文字起こし準備")
-            
-            # 1. 文字起こし
-            logger.info(f"🔄 処理ステップ [2/4]: 文字起こし実行中...")
-            transcription = transcribe_file(file_path, config)
-            if not transcription or should_stop:
-                logger.warning(f"❌ 文字起こしに失敗または中断されました: {file_path}")
-                file_queue.task_done()
-                continue
-            
-            # 文字起こし結果を保存
-            base_name = os.path.splitext(os.path.basename(file_path))[0]
-            timestamp = datetime.now().strftime("%Y-%m%d-%H%M")
-            
-            # 文字起こしディレクトリに保存
-            transcript_dir = config["file_watcher"]["transcript_directory"]
-            # ディレクトリの存在チェックは validate_config で行われているので、ここでは省略
-            
-            transcript_file = os.path.join(transcript_dir, f"{base_name}_transcript_{timestamp}.txt")
-            with open(transcript_file, "w", encoding="utf-8") as f:
-                f.write(transcription)
-            logger.info(f"✅ 文字起こし結果を保存しました: {transcript_file}")
-            
-            # 2. LLM API呼び出し
-            logger.info(f"🔄 処理ステップ [3/4]: LLM APIで議事録生成中...")
-            memo = call_llm_api(transcription, config)
-            
-            if not memo or should_stop:
-                logger.warning(f"❌ 議事録生成に失敗または中断されました: {file_path}")
-                file_queue.task_done()
+            # 処理待ちのジョブを取得（なければ通知を待つ）
+            job = claim_next_job()
+            if job is None:
+                # 待機中に長時間使われていないモデルを解放
+                model_manager.unload_idle(config)
+                job_available.wait(timeout=1)
+                job_available.clear()
                 continue
             
-            # 3. 結果を保存
-            logger.info(f"🔄 処理ステップ [4/4]: 議事録保存中...")
-            output_file = save_output(memo, file_path, config)
-            
-            logger.info(f"✅✅ 処理完了: {base_filename}")
-            logger.info(f"📄 出力ファイル: {output_file}")
-            logger.info(f"===== 処理終了: {base_filename} =====")
-            
-            # 4. 処理済みとしてマーク
-            mark_file_as_processed(file_path, output_file)
-            
-            # キューのタスク完了を通知
-            file_queue.task_done()
+            process_job(job)
         
         except Exception as e:
             logger.exception(f"ファイル処理中に例外が発生しました: {e}")
-            try:
-                file_queue.task_done()
-            except:
-                pass
+            if job is not None:
+                try:
+                    update_job(job["id"], JOB_FAILED, error=str(e))
+                except Exception:
+                    pass
     
-    logger.info("ファイル処理スレッドを終了しました。")
+    logger.info(f"ファイル処理スレッド（ワーカー {worker_id}）を終了しました。")
 
 
 def start_file_watcher(config: Dict[str, Any]) -> Optional[Observer]:
@@ -1155,8 +3929,8 @@ def check_existing_files(config: Dict[str, Any]):
                     processed_count += 1
                     continue
                     
-                file_queue.put(file_path)
-                count += 1
+                if enqueue_job(file_path):
+                    count += 1
     
     if count > 0:
         logger.info(f"ディレクトリ内の未処理メディアファイル {count}個 をキューに追加しました。")
@@ -1222,10 +3996,11 @@ def validate_config(config: Dict[str, Any]) -> bool:
 
 def start_service():
     """サービスの開始"""
-    global processing_thread, observer, should_stop, config
+    global processing_threads, observer, should_stop, config, config_mtime, service_cancel_token
     
     # 設定の読み込みと検証
     config = load_config()
+    config_mtime = os.path.getmtime(CONFIG_PATH)
     if not validate_config(config):
         logger.error("設定の検証に失敗しました。")
         return False
@@ -1239,10 +4014,25 @@ def start_service():
     # 処理済みファイルリストのクリーンアップ
     clean_old_processed_files()
     
+    # 停止したプロセスが処理していたジョブを再開可能にする
+    recover_jobs()
+    
+    # 文字起こしモデルを事前にロード（ロード中に届いたジョブはロード完了を待つ）
+    threading.Thread(target=model_manager.warm_up, args=(config,), name="model-warmup", daemon=True).start()
+    
     # ファイル処理スレッドの開始
     should_stop = False
-    processing_thread = threading.Thread(target=process_file_queue, daemon=True)
-    processing_thread.start()
+    service_cancel_token = CancellationToken()
+    num_workers = get_num_workers(config)
+    processing_threads = [
+        threading.Thread(target=process_file_queue, args=(worker_id,), name=f"worker-{worker_id}", daemon=True)
+        for worker_id in range(1, num_workers + 1)
+    ]
+    for thread in processing_threads:
+        thread.start()
+    # 処理中ジョブのリースを延長し、他のプロセスが中断したジョブも回収する
+    threading.Thread(target=maintain_job_leases, args=(service_cancel_token,), name="job-lease", daemon=True).start()
+    logger.info(f"文字起こしワーカーを {num_workers}個 起動しました（ワーカーあたりCPUスレッド数: {get_cpu_threads_per_worker(config)}）")
     
     # ファイル監視の開始
     observer = start_file_watcher(config)
@@ -1259,10 +4049,11 @@ def start_service():
 
 def stop_service():
     """サービスの停止"""
-    global processing_thread, observer, should_stop
+    global processing_threads, observer, should_stop
     
-    # 停止フラグの設定
+    # 停止フラグの設定と実行中処理のキャンセル
     should_stop = True
+    service_cancel_token.cancel("サービスが停止されました")
     
     # ファイル監視の停止
     if observer:
@@ -1271,9 +4062,17 @@ def stop_service():
         observer = None
     
     # 処理スレッドの待機
-    if processing_thread and processing_thread.is_alive():
-        processing_thread.join(timeout=5)
-        processing_thread = None
+    deadline = time.monotonic() + 5
+    for thread in processing_threads:
+        if thread.is_alive():
+            thread.join(timeout=max(0.0, deadline - time.monotonic()))
+            if thread.is_alive():
+                logger.warning(f"⚠️ ファイル処理スレッド（{thread.name}）が時間内に終了しませんでした。実行中の処理は中断されます。")
+    processing_threads = []
+    
+    # LLM APIの試行結果を集計して記録し、HTTPセッションを解放
+    log_llm_attempt_stats()
+    close_llm_sessions()
     
     logger.info("🛑 KoeMemoサービスが停止されました。")
 
@@ -8,6 +8,7 @@
 import os
 import sys
 import json
+import sqlite3
 import tkinter as tk
 from tkinter import ttk, messagebox, StringVar
 import subprocess
@@ -16,6 +17,8 @@ from pathlib import Path
 
 # 設定ファイルのパス
 CONFIG_PATH = Path(__file__).parent / "config.json"
+# 処理履歴データベースのパス
+DB_PATH = Path(__file__).parent / "koememo.db"
 
 class ProcessedFilesViewer:
     def __init__(self, root):
@@ -37,6 +40,27 @@ class ProcessedFilesViewer:
         except (FileNotFoundError, json.JSONDecodeError) as e:
             messagebox.showerror("エラー", f"設定ファイルの読み込みに失敗しました: {e}")
             return {}
+    
+    def load_processed_files(self):
+        """処理済みファイル情報を新しい順に取得"""
+        if not DB_PATH.exists():
+            # データベース移行前は設定ファイルの処理済みファイルセクションを参照
+            return list(self.config.get("processed_files", {}).values())
+        
+        try:
+            # 読み取り専用で開き、サービスの書き込みを妨げない
+            conn = sqlite3.connect(f"{DB_PATH.as_uri()}?mode=ro", uri=True, timeout=5)
+            conn.row_factory = sqlite3.Row
+            try:
+                rows = conn.execute(
+                    "SELECT file_path, output_file, processed_at FROM processed_files ORDER BY processed_at DESC"
+                ).fetchall()
+            finally:
+                conn.close()
+            return [dict(row) for row in rows]
+        except sqlite3.Error as e:
+            messagebox.showerror("エラー", f"処理履歴の読み込みに失敗しました: {e}")
+            return []
             
     def build_ui(self):
         """UIの構築"""
@@ -124,7 +148,7 @@ class ProcessedFilesViewer:
             self.tree.delete(item)
         
         # 処理済みファイルリストを取得
-        processed_files = self.config.get("processed_files", {})
+        processed_files = self.load_processed_files()
         if not processed_files:
             # データがない場合は通知を表示
             self.tree.insert("", tk.END, values=("処理済みファイルはありません", "", ""))
@@ -132,13 +156,16 @@ class ProcessedFilesViewer:
         
         # データを整形してツリービューに追加
         items = []
-        for file_hash, info in processed_files.items():
+        for info in processed_files:
             # 出力ファイルパスから元ファイル名を抽出（先頭の部分）
-            output_file = info.get("output_file", "")
+            output_file = info.get("output_file") or ""
             output_basename = os.path.basename(output_file)
             
-            # "_memo_" の前の部分を取得（元ファイル名として）
-            original_name = output_basename.split("_memo_")[0] if "_memo_" in output_basename else "不明"
+            # 元ファイルのパスがあればそのファイル名、なければ "_memo_" の前の部分を使用
+            if info.get("file_path"):
+                original_name = os.path.basename(info["file_path"])
+            else:
+                original_name = output_basename.split("_memo_")[0] if "_memo_" in output_basename else "不明"
             
             # 処理日時をフォーマット
             processed_at = info.get("processed_at", "")